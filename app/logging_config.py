@@ -1,10 +1,13 @@
+import atexit
+import copy
 import logging
 import os
 import json
+import queue
 from datetime import datetime, timezone
 from typing import Any, Dict
 from zoneinfo import ZoneInfo
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 
 
@@ -75,15 +78,45 @@ class JsonFormatter(logging.Formatter):
 
 
 
+class _RecordQueueHandler(QueueHandler):
+    """Queue handler for an in-process listener.
+
+    The stock prepare() pre-formats the record and drops exc_info; here only the message
+    is merged with its args, so JsonFormatter on the listener side still sees the
+    exception and every extra field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+# Formatting and stream/file I/O run on this listener's thread, so request and LLM
+# worker threads only enqueue records instead of blocking on stdout or log rotation.
+_listener: QueueListener | None = None
+
+
+def _stop_listener() -> None:
+    # Flush queued records on interpreter exit
+    if _listener is not None:
+        _listener.stop()
+
+
+atexit.register(_stop_listener)
+
+
 def configure_logging(level: int = logging.INFO, log_file: str | None = None) -> None:
     """Configure the root logger to use JSON formatter. Logs to terminal and file in local/dev."""
+    global _listener
     root = logging.getLogger()
     env = os.environ.get("ENV", "production").lower()
     # Avoid adding multiple handlers during module reloads
-    if any(isinstance(h.formatter, JsonFormatter) for h in root.handlers if h.formatter):
+    if _listener is not None and any(isinstance(h, _RecordQueueHandler) for h in root.handlers):
         # Even if handlers exist, still ensure levels are set correctly
         root.setLevel(level)
-        for h in root.handlers:
+        for h in root.handlers + list(_listener.handlers):
             h.setLevel(level)
         # Silence noisy httpx/httpcore logs (explicit)
         logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -121,11 +154,17 @@ def configure_logging(level: int = logging.INFO, log_file: str | None = None) ->
             file_handler.setFormatter(JsonFormatter())
             handlers.append(file_handler)
 
-    root.handlers = handlers
+    if _listener is not None:
+        _listener.stop()
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    root.handlers = [_RecordQueueHandler(log_queue)]
     root.setLevel(level)
 
     # Ensure handlers don't filter out records below the level
-    for h in root.handlers:
+    for h in root.handlers + handlers:
         h.setLevel(level)
 
     # Silence noisy httpx/httpcore logs by default
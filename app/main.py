@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from app.routers import applications, profiles
 from app.routers import google_drive as google_drive_router
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from app.logging_config import configure_logging, get_logger, bind_logger
 import os
 import errno
@@ -104,6 +105,8 @@ app.add_middleware(
     allow_headers=["*"],    # Allows all headers
     expose_headers=["Content-Disposition"],  # <-- expose filename header to the browser
 )
+# Compress larger JSON payloads (job histories, resume text, analyses)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 
 # Include the routers
@@ -112,6 +115,14 @@ app.include_router(profiles.router)
 app.include_router(google_drive_router.router, prefix="/google-drive")
 
 
+@app.on_event("startup")
+def warm_google_clients() -> None:
+    # Pay the Google client import cost at boot rather than on the first Drive request.
+    if os.environ.get("GDRIVE_EAGER_IMPORT", "1") == "1":
+        from app.services import google_drive_service
+        google_drive_service.warmup()
+
+
 
 @app.get("/")
 def read_root():
@@ -138,6 +138,28 @@ class ProcessResumeResponse(BaseModel):
     class Config:
         orm_mode = True
 
+class ProcessResumeEnqueueResponse(BaseModel):
+    # process_resume_jobs.id is a uuid
+    job_id: str
+    status_url: str
+    status: str
+
+class ProcessResumeStatusResponse(BaseModel):
+    """Status of an enqueued `/process-resume` job.
+
+    Fields:
+    - job_id: The job ID.
+    - status: pending, processing, completed or failed.
+    - result: parsed jobs, summary and skills once the job has completed.
+    - error: Any error message.
+    - updated_at: Timestamp of last update.
+    """
+    job_id: str
+    status: str
+    result: Optional[ProcessResumeResponse] = None
+    error: Optional[str] = None
+    updated_at: Optional[str] = None
+
 class JobHistoriesResponse(BaseModel):
     """Combined response for job histories plus stored summary and skills.
 
@@ -218,4 +240,3 @@ class ResumeHistoryExtraction(BaseModel):
     # Ensure additionalProperties: false in generated JSON Schema
     model_config = ConfigDict(extra='forbid')
 
-
@@ -6,9 +6,8 @@ if os.getenv("ENV", "development") != "production":
     os.environ.setdefault("OAUTHLIB_INSECURE_TRANSPORT", "1")
 
 from typing import Any, Dict, Optional
-import json
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
 from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse
 
 from app.security import get_current_user
@@ -17,12 +16,14 @@ from app.services.google_drive_service import (
     sign_state,
     verify_state,
     save_credentials,
+    creds_to_dict,
     load_credentials,
-    build_drive_service,
+    get_user_drive_service,
     export_google_doc_text,
     build_server_drive_service,
     get_file_metadata,
     download_file_bytes,
+    download_file_stream,
     upload_bytes_as_google_doc,
     upload_bytes_raw,
     upsert_profile_master_resume_id,
@@ -127,7 +128,7 @@ async def oauth2callback(request: Request, state: str = Query(...), code: str =
         flow = build_flow(redirect_uri)
         flow.fetch_token(authorization_response=str(request.url))
         creds = flow.credentials
-        save_credentials(user_id, json.loads(creds.to_json()))
+        save_credentials(user_id, creds_to_dict(creds))
         html = _popup_close_page("ok", user_id, origin, None)
         return HTMLResponse(content=html, media_type="text/html")
     except Exception as e:
@@ -141,7 +142,7 @@ async def oauth2callback(request: Request, state: str = Query(...), code: str =
 
 
 @router.post("/open-file", response_model=GoogleDriveOpenFileResponse)
-async def open_file(payload: GoogleDriveOpenFileRequest, user=Depends(get_current_user)):
+async def open_file(payload: GoogleDriveOpenFileRequest, background_tasks: BackgroundTasks, user=Depends(get_current_user)):
     """Copy a user's selected Drive file into the server's Drive and return its contents.
 
     Flow:
@@ -162,8 +163,7 @@ async def open_file(payload: GoogleDriveOpenFileRequest, user=Depends(get_curren
     log.info("open_file: start")
 
     # Build user and server Drive clients
-    user_creds = load_credentials(str(user.id))
-    user_drive = build_drive_service(user_creds)
+    user_drive = get_user_drive_service(str(user.id), background_tasks)
     server_drive = build_server_drive_service()
 
     # Identify source file type
@@ -208,7 +208,7 @@ async def open_file(payload: GoogleDriveOpenFileRequest, user=Depends(get_curren
         else:
             # Case 3: Other types (e.g., PDF). Download and convert to Google Doc.
             log.info("open_file: downloading non-Doc file bytes from user Drive", extra={"mime": src_mime})
-            raw = download_file_bytes(user_drive, file_id)
+            raw = download_file_stream(user_drive, file_id)
             # Choose a reasonable source mime for upload; fall back to application/octet-stream
             source_mime = src_mime or "application/octet-stream"
             log.info("open_file: uploading to server Drive as Google Doc (conversion)", extra={"dest_name": dest_name})
@@ -285,14 +285,14 @@ async def open_file(payload: GoogleDriveOpenFileRequest, user=Depends(get_curren
 
 
 @router.get("/auth-status")
-async def auth_status(user=Depends(get_current_user)):
+async def auth_status(background_tasks: BackgroundTasks, user=Depends(get_current_user)):
     """Check if the user has authenticated their Google account.
 
     Attempts to load and, if necessary, refresh credentials. If refresh fails (e.g., invalid_grant), returns False
     so the frontend can prompt for re-authorization.
     """
     try:
-        creds = load_credentials(str(user.id))
+        creds = load_credentials(str(user.id), background_tasks)
         # If load_credentials returned without raising, creds are valid or have been refreshed successfully
         if creds and creds.valid:
             return {"authenticated": True}
@@ -3,7 +3,8 @@
 
 from zoneinfo import ZoneInfo
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from typing import List
+import logging
+from typing import List, Tuple
 from app.security import get_current_user
 from app.models.schemas import (
     ResumeUpload,
@@ -18,10 +19,10 @@ from app.models.schemas import (
     ResumeSkillsResponse,
     ResumeFileUploadResponse,
     GoogleDriveFileRef,
-    ProcessResumeResponse,
+    ProcessResumeEnqueueResponse,
+    ProcessResumeStatusResponse,
     JobHistoriesResponse,
 )
-from app.services import llm_service
 from app.services.resume_service import run_resume_check_process
 from app.models.schemas import ResumeCheckRequest, ResumeCheckEnqueueResponse
 from datetime import datetime, timezone
@@ -53,14 +54,28 @@ log.info(f"Supabase URL: {supabase_url}")
 supabase_service_key = os.environ.get("SUPABASE_SERVICE_KEY") or ""
 supabase: Client = create_client(supabase_url, supabase_service_key)
 
+# Resolved once; timestamps written by this router use Pacific time like the workers
+_LA_TZ = ZoneInfo("America/Los_Angeles")
+
+JOB_HISTORY_COLUMNS = "id, user_id, company_name, job_title, achievements, detailed_background, is_default_rewrite"
+
+RequestCtx = Tuple[str, logging.LoggerAdapter]
+
+
+def request_ctx(agent_name: str = "profiles_router"):
+    """Build a dependency returning (user_id, bound logger) once per request."""
+    async def _ctx(user=Depends(get_current_user)) -> RequestCtx:
+        user_id = str(user.id)
+        return user_id, bind_logger(logger, {"agent_name": agent_name, "user_id": user_id})
+    return _ctx
+
 
 @router.get("/me", response_model=ProfileResponse)
-async def get_my_profile(user=Depends(get_current_user)):
+async def get_my_profile(ctx: RequestCtx = Depends(request_ctx())):
     """
     Retrieves the profile for the currently logged-in user.
     """
-    user_id = str(user.id)
-    log = bind_logger(logger, {"agent_name": "profiles_router", "user_id": user_id})
+    user_id, log = ctx
     result = supabase.table("profiles").select("id, email, base_resume_text").eq("id", user_id).single().execute().data
     
     if not result:
@@ -71,14 +86,14 @@ async def get_my_profile(user=Depends(get_current_user)):
     return result
 
 @router.get("/job-histories", response_model=JobHistoriesResponse)
-async def get_all_job_histories(user=Depends(get_current_user)):
+async def get_all_job_histories(ctx: RequestCtx = Depends(request_ctx())):
     """Return all parsed job histories plus stored summary and skills.
 
     NOTE: Response changed from a raw list -> object with `jobs`, `summary`, `skills`.
     """
-    user_id = str(user.id)
-    log = bind_logger(logger, {"agent_name": "profiles_router", "user_id": user_id})
-    jobs = supabase.table("job_histories").select("*").eq("user_id", user_id).order("id").execute().data
+    user_id, log = ctx
+    # Project only the columns JobHistoryResponse declares
+    jobs = supabase.table("job_histories").select(JOB_HISTORY_COLUMNS).eq("user_id", user_id).order("id").execute().data
     profile = supabase.table("profiles").select("base_summary_text, base_skills_text").eq("id", user_id).single().execute().data
     summary = profile.get("base_summary_text") if profile else None
     skills = profile.get("base_skills_text") if profile else None
@@ -86,12 +101,11 @@ async def get_all_job_histories(user=Depends(get_current_user)):
 
 
 @router.get("/resume-text", response_model=ResumeTextResponse)
-async def get_my_resume_text(user=Depends(get_current_user)):
+async def get_my_resume_text(ctx: RequestCtx = Depends(request_ctx())):
     """
     Return the current user's stored base resume text (if any).
     """
-    user_id = str(user.id)
-    log = bind_logger(logger, {"agent_name": "profiles_router", "user_id": user_id})
+    user_id, log = ctx
     try:
         profile = supabase.table("profiles").select("base_resume_text").eq("id", user_id).single().execute().data
         if not profile:
@@ -106,12 +120,11 @@ async def get_my_resume_text(user=Depends(get_current_user)):
 
 
 @router.get("/summary", response_model=ResumeSummaryResponse)
-async def get_my_summary(user=Depends(get_current_user)):
+async def get_my_summary(ctx: RequestCtx = Depends(request_ctx())):
     """
     Return the current user's stored professional summary (base_summary_text).
     """
-    user_id = str(user.id)
-    log = bind_logger(logger, {"agent_name": "profiles_router", "user_id": user_id})
+    user_id, log = ctx
     try:
         profile = supabase.table("profiles").select("base_summary_text").eq("id", user_id).single().execute().data
         if not profile:
@@ -126,12 +139,11 @@ async def get_my_summary(user=Depends(get_current_user)):
 
 
 @router.get("/skills", response_model=ResumeSkillsResponse)
-async def get_my_skills(user=Depends(get_current_user)):
+async def get_my_skills(ctx: RequestCtx = Depends(request_ctx())):
     """
     Return the current user's stored skills section (base_skills_text).
     """
-    user_id = str(user.id)
-    log = bind_logger(logger, {"agent_name": "profiles_router", "user_id": user_id})
+    user_id, log = ctx
     try:
         profile = supabase.table("profiles").select("base_skills_text").eq("id", user_id).single().execute().data
         if not profile:
@@ -145,97 +157,83 @@ async def get_my_skills(user=Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
 
-@router.post("/process-resume", response_model=ProcessResumeResponse)
+@router.post("/process-resume", status_code=202, response_model=ProcessResumeEnqueueResponse)
 async def process_resume(
     resume_data: ResumeUpload,
-    user=Depends(get_current_user)
+    ctx: RequestCtx = Depends(request_ctx("process-resume"))
 ):
     """
     User Story 1:
-    Uploads a resume, parses it, and stores the job history.
-    This action will DELETE all previous job histories for the user.
+    Enqueue a resume for parsing and return job id + status URL.
+    When the job runs it will DELETE all previous job histories for the user
+    and store the newly parsed ones (see `run_process_resume`).
     """
-    user_id = str(user.id)
-    log = bind_logger(logger, {"agent_name": "process-resume", "user_id": user_id})
+    user_id, log = ctx
     try:
-        # First, delete any existing job histories to prevent duplicates
-        supabase.table("job_histories").delete().eq("user_id", user_id).execute()
+        if not resume_data.resume_text or resume_data.resume_text.strip() == "":
+            raise HTTPException(status_code=400, detail="resume_text must be provided and non-empty.")
+        now = datetime.now(_LA_TZ).isoformat()
+        payload = {
+            "user_id": user_id,
+            "resume_text": resume_data.resume_text,
+            "status": "pending",
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        result = supabase.table("process_resume_jobs").insert(payload).execute()
+        err = getattr(result, "error", None)
+        if err:
+            log.error("Failed to enqueue process resume: %s", getattr(err, "message", str(err)))
+            raise HTTPException(status_code=500, detail="Failed to enqueue job")
+        job_id = result.data[0]["id"]
+        log.info("Enqueued process_resume job", extra={"job_id": job_id})
+        return {"job_id": job_id, "status_url": f"/profiles/process-resume/{job_id}", "status": "pending"}
+    except HTTPException as e:
+        log.error("HTTP error occurred: %s", e.detail)
+        raise
+    except Exception as e:
+        log.exception("Error enqueuing process resume: %s", e)
+        raise HTTPException(status_code=500, detail=f'Internal error: {e}')
 
-        # Call the LLM to parse the resume
-        try:
-            professional_summary = llm_service.extract_professional_summary(resume_data.resume_text)
-            log.info("Extracted professional summary")
-            log.info(professional_summary)
-        except Exception as e:
-            log.error("Error extracting professional summary: %s", str(e))
-            raise HTTPException(status_code=500, detail="Error extracting professional summary")
 
-        # Extract skills section
-        try:
-            skills_text = llm_service.extract_resume_skills(resume_data.resume_text)
-            log.info("Extracted skills section")
-            log.info(skills_text)
-        except Exception as e:
-            log.error("Error extracting skills: %s", str(e))
-            raise HTTPException(status_code=500, detail="Error extracting skills section")
+@router.get("/process-resume/{job_id}", response_model=ProcessResumeStatusResponse)
+async def get_process_resume_status(job_id: str, ctx: RequestCtx = Depends(request_ctx())):
+    """
+    Retrieve the status and result of an enqueued process-resume job.
+    """
+    user_id, log = ctx
+    try:
+        row = supabase.table("process_resume_jobs").select("id, user_id, status, result, error, updated_at").eq("id", job_id).single().execute().data
+        if not row:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if row.get("user_id") != user_id:
+            raise HTTPException(status_code=403, detail="Not authorized to view this job")
 
-        try:
-            parsed_jobs = llm_service.parse_resume_to_json(resume_data.resume_text)
-        except Exception as e:
-            log.error("Error extracting job histories from resume: %s", str(e))
-            raise HTTPException(status_code=500, detail="Error extracting job histories from resume")
-
-        # --- THIS IS THE NEW MAPPING LOGIC ---
-        # Transform the LLM output to match our database schema.
-        jobs_to_insert = []
-        for job in parsed_jobs:
-            jobs_to_insert.append({
-                'user_id': user_id,
-                'company_name': job.get('history_company_name'),
-                'job_title': job.get('history_job_title'),
-                # Store the entire original achievements/responsibilities block as a single string
-                'achievements': job.get('history_job_achievements') or ""
-            })
-
-        # Bulk insert the new, correctly formatted job histories
-        inserted_data = supabase.table("job_histories").insert(jobs_to_insert).execute().data
-
-        # Merge profile updates into a single payload and perform one update call
-        profile_update = {}
-        if professional_summary is not None:
-            profile_update["base_summary_text"] = professional_summary
-        if skills_text is not None:
-            profile_update["base_skills_text"] = skills_text
-        if resume_data.resume_text is not None:
-            profile_update["base_resume_text"] = resume_data.resume_text
-
-        if profile_update:
-            supabase.table("profiles").update(profile_update).eq("id", user_id).execute()
-
-        log.info("Inserted parsed job histories", extra={"inserted_count": len(inserted_data) if inserted_data else 0})
         return {
-            "jobs": inserted_data or [],
-            "summary": professional_summary,
-            "skills": skills_text,
+            "job_id": row.get("id"),
+            "status": row.get("status"),
+            "result": row.get("result"),
+            "error": row.get("error"),
+            "updated_at": row.get("updated_at")
         }
-    except ValueError as e:
-        log.error("ValueError during resume processing: %s", str(e))
-        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
-        log.error("Unexpected error during resume processing: %s", str(e))
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
     
     
 @router.patch("/job-histories", response_model=List[JobHistoryResponse])
 async def update_job_histories(
     updates: List[JobHistoryUpdate],
-    user=Depends(get_current_user)
+    ctx: RequestCtx = Depends(request_ctx())
 ):
     """
     Updates the detailed_background and/or the is_default_rewrite flag
     for one or more job histories.
     """
-    user_id = str(user.id)
+    user_id, log = ctx
     valid_ids_response = supabase.table("job_histories").select("id").eq("user_id", user_id).execute().data
     valid_ids = {item['id'] for item in valid_ids_response}
 
@@ -256,12 +254,12 @@ async def update_job_histories(
             result = supabase.table("job_histories").update(update_payload).eq("id", update.id).execute().data
             if result:
                 updated_records.append(result[0])
-            
+
     return updated_records
 
 
 @router.post("/upload-resume", response_model=ResumeFileUploadResponse)
-async def upload_resume_file(file: UploadFile = File(...), user=Depends(get_current_user)):
+async def upload_resume_file(file: UploadFile = File(...), ctx: RequestCtx = Depends(request_ctx("upload-resume"))):
     """Upload a resume file and follow the same flow as open-file:
 
     - Validate extension (pdf, docx, doc, txt, md)
@@ -269,8 +267,7 @@ async def upload_resume_file(file: UploadFile = File(...), user=Depends(get_curr
     - Update `profiles.gdrive_master_resume_id`
     - Export and return plain text + markdown
     """
-    user_id = str(user.id)
-    log = bind_logger(logger, {"agent_name": "upload-resume", "user_id": user_id})
+    user_id, log = ctx
 
     # Validate extension and determine source mime
     filename = file.filename or "uploaded"
@@ -337,12 +334,11 @@ async def upload_resume_file(file: UploadFile = File(...), user=Depends(get_curr
 
 
 @router.post("/check-resume", status_code=202, response_model=ResumeCheckEnqueueResponse)
-async def enqueue_resume_check(request: ResumeCheckRequest, user=Depends(get_current_user)):
+async def enqueue_resume_check(request: ResumeCheckRequest, ctx: RequestCtx = Depends(request_ctx())):
     """Enqueue a resume check job and return job id + status URL."""
-    user_id = str(user.id)
-    log = bind_logger(logger, {"agent_name": "profiles_router", "user_id": user_id})
+    user_id, log = ctx
     try:
-        now = datetime.now(ZoneInfo("America/Los_Angeles")).isoformat()
+        now = datetime.now(_LA_TZ).isoformat()
 
         if request.job_post is None or request.job_post.strip() == "":
             if request.qualifications is None or request.qualifications.strip() == "":
@@ -381,11 +377,11 @@ async def enqueue_resume_check(request: ResumeCheckRequest, user=Depends(get_cur
 
 
 @router.get("/check-resume/{job_id}", response_model=ResumeCheckResponse)
-async def get_resume_check_status(job_id: int, user=Depends(get_current_user)):
+async def get_resume_check_status(job_id: int, ctx: RequestCtx = Depends(request_ctx())):
     """
     Retrieve the status and analysis of an enqueued resume check job.
     """
-    user_id = str(user.id)
+    user_id, log = ctx
     try:
         row = supabase.table("resume_checks").select("*").eq("id", job_id).single().execute().data
         if not row:
@@ -1,8 +1,12 @@
 import os
+import random
+from types import SimpleNamespace
+import jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from app.utils.ttl_cache import TTLCache
 
 load_dotenv(override=True)
 
@@ -10,15 +14,46 @@ supabase_url = os.environ.get("SUPABASE_URL")
 supabase_key = os.environ.get("SUPABASE_ANON_KEY")
 supabase: Client = create_client(supabase_url, supabase_key)
 
+# When set, access tokens are verified locally (HS256) instead of calling Supabase Auth.
+supabase_jwt_secret = os.environ.get("SUPABASE_JWT_SECRET")
+# Fraction of locally verified requests still checked against Supabase Auth to catch revocations.
+JWT_REMOTE_CHECK_RATE = float(os.environ.get("SUPABASE_JWT_REMOTE_CHECK_RATE", "0.01"))
+
+# Users verified through Supabase Auth, keyed by token, so repeat requests skip the round-trip.
+_remote_user_cache = TTLCache(maxsize=1024, ttl=60)
+
 security = HTTPBearer()
 
+
+def _decode_local(token: str):
+    """Return a minimal user object for a valid Supabase access token, else None."""
+    if not supabase_jwt_secret:
+        return None
+    try:
+        payload = jwt.decode(token, supabase_jwt_secret, algorithms=["HS256"], audience="authenticated")
+    except jwt.PyJWTError:
+        return None
+    sub = payload.get("sub")
+    if not sub:
+        return None
+    return SimpleNamespace(id=sub, email=payload.get("email"), role=payload.get("role"))
+
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         token = credentials.credentials
+        user = _decode_local(token)
+        if user is not None and random.random() >= JWT_REMOTE_CHECK_RATE:
+            return user
+
+        user = _remote_user_cache.get(token)
+        if user is not None:
+            return user
         user_response = supabase.auth.get_user(token)
         user = user_response.user
         if user is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+        _remote_user_cache.set(token, user)
         return user
     except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
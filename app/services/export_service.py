@@ -1,38 +1,76 @@
 from __future__ import annotations
 
-from typing import Tuple
+import re
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Tuple
 
 from fastapi import HTTPException
 
 from app.services import google_drive_service as gds
 from app.logging_config import get_logger, bind_logger
+from app.utils.ttl_cache import TTLCache
 
 logger = get_logger(__name__)
 
 # Google Doc mime
 GOOGLE_DOC = "application/vnd.google-apps.document"
 
+
+class _ExportFormat(NamedTuple):
+    mime: str
+    ext: str
+    mode: str
+
+
 # Supported export formats for Google Docs with their mime types and file extensions
-EXPORT_FORMATS = {
-    "pdf": {"mime": "application/pdf", "ext": ".pdf", "mode": "bytes"},
-    "docx": {"mime": "application/vnd.openxmlformats-officedocument.wordprocessingml.document", "ext": ".docx", "mode": "bytes"},
-    "odt": {"mime": "application/vnd.oasis.opendocument.text", "ext": ".odt", "mode": "bytes"},
-    "rtf": {"mime": "application/rtf", "ext": ".rtf", "mode": "bytes"},
-    "txt": {"mime": "text/plain", "ext": ".txt", "mode": "text"},
+_CANON = {
+    "pdf": _ExportFormat(mime="application/pdf", ext=".pdf", mode="bytes"),
+    "docx": _ExportFormat(mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document", ext=".docx", mode="bytes"),
+    "odt": _ExportFormat(mime="application/vnd.oasis.opendocument.text", ext=".odt", mode="bytes"),
+    "rtf": _ExportFormat(mime="application/rtf", ext=".rtf", mode="bytes"),
+    "txt": _ExportFormat(mime="text/plain", ext=".txt", mode="text"),
     # "html" exports as a zipped web page per Drive API
-    "html": {"mime": "application/zip", "ext": ".zip", "mode": "bytes"},
-    "epub": {"mime": "application/epub+zip", "ext": ".epub", "mode": "bytes"},
+    "html": _ExportFormat(mime="application/zip", ext=".zip", mode="bytes"),
+    "epub": _ExportFormat(mime="application/epub+zip", ext=".epub", mode="bytes"),
     # Markdown is supported per Drive API documentation
-    "md": {"mime": "text/markdown", "ext": ".md", "mode": "bytes"},
-    "markdown": {"mime": "text/markdown", "ext": ".md", "mode": "bytes"},
+    "md": _ExportFormat(mime="text/markdown", ext=".md", mode="bytes"),
 }
 
+# Alternate names accepted for a canonical format key
+_ALIASES = {"markdown": "md"}
+
+# Read-only view so callers cannot mutate the shared format table
+EXPORT_FORMATS: Mapping[str, _ExportFormat] = MappingProxyType(_CANON)
+
+
+def _resolve_format(fmt: Optional[str]) -> Optional[_ExportFormat]:
+    raw = (fmt or "").lower()
+    return _CANON.get(_ALIASES.get(raw, raw))
+
+
+# Exported bytes keyed by (doc_id, export_mime, modifiedTime). A new Drive revision changes
+# modifiedTime, so stale entries are never served; they simply age out.
+EXPORT_CACHE_TTL_SECONDS = 3600
+EXPORT_CACHE_MAX_BYTES = 5 * 1024 * 1024
+_export_cache = TTLCache(maxsize=128, ttl=EXPORT_CACHE_TTL_SECONDS)
+
+
+# Case-insensitive suffix matchers per export extension, compiled once at import so
+# _export_filename does not lowercase a full copy of the filename on every export.
+_EXT_RE = {ext: re.compile(re.escape(ext) + r"\Z", re.I) for ext in {e.ext for e in _CANON.values()}}
+
 
 def _export_filename(base_name: str, desired_ext: str) -> str:
-    name = (base_name or "").replace("\n", "").strip()
+    name = base_name or ""
+    if "\n" in name:
+        name = name.replace("\n", "")
+    name = name.strip()
     if not name:
         name = "export"
-    if not name.lower().endswith(desired_ext):
+    ext_re = _EXT_RE.get(desired_ext)
+    if ext_re is None:
+        ext_re = _EXT_RE[desired_ext] = re.compile(re.escape(desired_ext) + r"\Z", re.I)
+    if not ext_re.search(name):
         name = f"{name}{desired_ext}"
     return name
 
@@ -43,8 +81,7 @@ def export_application_bytes(application_id: int, user_id: str, fmt: str) -> Tup
     Raises HTTPException on errors (404/403/415/409/500) as appropriate.
     """
     log = bind_logger(logger, {"agent": "export_service", "application_id": application_id, "user_id": str(user_id), "format": fmt})
-    fmt_key = (fmt or "").lower()
-    cfg = EXPORT_FORMATS.get(fmt_key)
+    cfg = _resolve_format(fmt)
     if not cfg:
         log.warning("Unsupported export format requested")
         raise HTTPException(status_code=415, detail=f"Unsupported export format: {fmt}")
@@ -64,27 +101,33 @@ def export_application_bytes(application_id: int, user_id: str, fmt: str) -> Tup
         raise HTTPException(status_code=404, detail="No source Google Doc available for export")
 
     drive = gds.build_server_drive_service()
-    meta = gds.get_file_metadata(drive, doc_id, fields="id, name, mimeType, size")
+    meta = gds.get_file_metadata(drive, doc_id, fields="id, name, mimeType, size, modifiedTime")
     src_mime = meta.get("mimeType")
     src_name = meta.get("name") or f"application-{application_id}"
     log.info("Loaded source doc for export", extra={"doc_id": doc_id, "src_mime": src_mime, "src_name": src_name})
 
-    export_mime = cfg["mime"]
-    ext = cfg["ext"]
-    mode = cfg["mode"]
+    export_mime, ext, mode = cfg
 
     # If the source is not a Google Doc, only allow download when the requested format matches the source mime
     if src_mime != GOOGLE_DOC and export_mime != src_mime:
         log.warning("Source is not a Google Doc; requested conversion unsupported", extra={"requested": export_mime})
         raise HTTPException(status_code=409, detail="Source file is not a Google Doc; cannot export to requested format")
 
-    if mode == "text":
-        log.info("Exporting Google Doc as plain text")
-        content = gds.export_google_doc_text(drive, doc_id)
-        data = content.encode("utf-8")
+    modified_time = meta.get("modifiedTime")
+    cache_key = f"export:{doc_id}:{export_mime}:{modified_time}" if modified_time else None
+    data = _export_cache.get(cache_key) if cache_key else None
+    if data is not None:
+        log.info("Serving export from cache", extra={"export_mime": export_mime, "modified_time": modified_time})
     else:
-        log.info("Exporting Google Doc as bytes", extra={"export_mime": export_mime})
-        data = gds.export_google_doc_bytes(drive, doc_id, export_mime)
+        if mode == "text":
+            log.info("Exporting Google Doc as plain text")
+            content = gds.export_google_doc_text(drive, doc_id)
+            data = content.encode("utf-8")
+        else:
+            log.info("Exporting Google Doc as bytes", extra={"export_mime": export_mime})
+            data = gds.export_google_doc_bytes(drive, doc_id, export_mime)
+        if cache_key and len(data) < EXPORT_CACHE_MAX_BYTES:
+            _export_cache.set(cache_key, data)
 
     filename = _export_filename(src_name, ext)
     log.info("Export completed", extra={"filename": filename, "export_mime": export_mime, "size": len(data)})
@@ -92,8 +135,7 @@ def export_application_bytes(application_id: int, user_id: str, fmt: str) -> Tup
 
 
 def head_export_check(application_id: int, user_id: str, fmt: str) -> None:
-    fmt_key = (fmt or "").lower()
-    cfg = EXPORT_FORMATS.get(fmt_key)
+    cfg = _resolve_format(fmt)
     if not cfg:
         raise HTTPException(status_code=415, detail=f"Unsupported export format: {fmt}")
 
@@ -107,6 +149,6 @@ def head_export_check(application_id: int, user_id: str, fmt: str) -> None:
     drive = gds.build_server_drive_service()
     meta = gds.get_file_metadata(drive, app_row["gdrive_doc_resume_id"], fields="id, mimeType")
     src_mime = meta.get("mimeType")
-    export_mime = cfg["mime"]
+    export_mime = cfg.mime
     if src_mime != GOOGLE_DOC and export_mime != src_mime:
         raise HTTPException(status_code=409, detail="Source not convertible to requested format")
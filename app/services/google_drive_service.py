@@ -11,45 +11,107 @@ Notes:
 """
 from __future__ import annotations
 
+import atexit
 import base64
+import bisect
+import functools
 import hashlib
 import hmac
 import io
+import itertools
 from dataclasses import dataclass
+from datetime import datetime, timezone
 import os
+import queue
+import re
+import threading
 import time
 import json
 import uuid
-"""
-Google Drive OAuth and file operations service (lazy-imported deps).
-
-Notes:
-- Uses Supabase to persist per-user OAuth credentials in table `google_drive_tokens`.
-- Performs OAuth web server flow using google_auth_oauthlib.flow.Flow.
-- Scopes limited to drive.file (files created/selected by the app/user).
-- Adds support for a server-owned Google Drive using a service account for
-    storing permanent copies of user-selected files.
-- Lazy imports are used so the app can boot without Google libs installed.
-"""
+from collections import Counter
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 
 from fastapi import HTTPException
-from supabase import create_client, Client
 
 from app.logging_config import get_logger, bind_logger
+from app.utils.ttl_cache import TTLCache
 from zoneinfo import ZoneInfo
+
+if TYPE_CHECKING:
+    from fastapi import BackgroundTasks
+    from supabase import Client
 logger = get_logger(__name__)
 log = bind_logger(logger)
 log.info("started")
 
+__all__ = [
+    "DRIVE_SCOPES",
+    "SERVER_DRIVE_SCOPES",
+    "SHARED_DRIVE_FOLDER_ID",
+    "TOK_TABLE",
+    "basic_analyze_text",
+    "build_docs_service",
+    "build_drive_service",
+    "build_flow",
+    "build_server_docs_service",
+    "build_server_drive_service",
+    "copy_file_to_server_drive",
+    "creds_to_dict",
+    "delete_file",
+    "download_file_bytes",
+    "download_file_stream",
+    "export_google_doc_bytes",
+    "export_google_doc_text",
+    "get_file_metadata",
+    "get_service_account_credentials",
+    "get_supabase",
+    "get_user_drive_service",
+    "invalidate_credentials",
+    "load_credentials",
+    "reset_supabase_client",
+    "save_credentials",
+    "sign_state",
+    "update_file_content",
+    "upload_bytes_as_google_doc",
+    "upload_bytes_raw",
+    "upsert_profile_master_resume_id",
+    "verify_state",
+    "warmup",
+]
+
 # -------- Supabase client (service key) - lazy to avoid startup failures --------
+_SUPABASE_LOCK = threading.Lock()
+
+
+@functools.cache
+def _lazy_import_supabase():
+    # supabase pulls in httpx/postgrest/gotrue; only pay for it once a client is needed.
+    from supabase import create_client
+    return create_client
+
+
+@functools.lru_cache(maxsize=1)
+def _get_supabase_cached(url: str, key: str) -> Client:
+    create_client = _lazy_import_supabase()
+    return create_client(url, key)
+
+
 def get_supabase() -> Client:
+    """Return the shared service-key Supabase client, created on first use."""
     url = os.environ.get("SUPABASE_URL")
     key = os.environ.get("SUPABASE_SERVICE_KEY")
     if not url or not key:
         raise HTTPException(status_code=500, detail="Supabase configuration missing")
-    return create_client(url, key)
+    # The lock keeps concurrent first calls from each constructing a client.
+    with _SUPABASE_LOCK:
+        return _get_supabase_cached(url, key)
+
+
+def reset_supabase_client() -> None:
+    """Drop the shared client so the next get_supabase() builds a fresh one."""
+    with _SUPABASE_LOCK:
+        _get_supabase_cached.cache_clear()
 
 
 GOOGLE_CLIENT_SECRET_FILENAME = "client_secret_oauth_apps.googleusercontent.com.json"
@@ -61,6 +123,11 @@ SERVER_SERVICE_ACCOUNT_FILENAME = "server-client-0961468170-bd62942bd1ac.com.jso
 SERVER_SERVICE_ACCOUNT_PATH = str(Path(__file__).resolve().parent.parent / SERVER_SERVICE_ACCOUNT_FILENAME)
 # Shared Drive folder where server should store master resumes. Can be overridden via env.
 SHARED_DRIVE_FOLDER_ID = os.environ.get("GOOGLE_SHARED_DRIVE_FOLDER_ID", "0ABNYGt-LYK-JUk9PVA")
+# Bytes per Drive media request; the client default (100 KB) costs a round-trip per 100 KB downloaded.
+DRIVE_CHUNK_SIZE = int(os.environ.get("DRIVE_CHUNK_SIZE", 8 * 1024 * 1024))
+# Uploads above this size switch from a single POST to a chunked resumable upload.
+RESUMABLE_UPLOAD_THRESHOLD = 5 * 1024 * 1024
+
 DRIVE_SCOPES = [
     # Minimal scope to read files the user selects via Picker or
     # any files the user already has access to. No write/create.
@@ -68,6 +135,8 @@ DRIVE_SCOPES = [
 ]
 
 
+# The _lazy_import_* helpers are memoized so repeated calls skip the import machinery.
+@functools.cache
 def _lazy_import_media_download():
         from googleapiclient.http import MediaIoBaseDownload  # type: ignore
         return MediaIoBaseDownload
@@ -75,57 +144,121 @@ def _lazy_import_media_download():
 OAUTH_STATE_SECRET = os.environ.get("OAUTH_STATE_SECRET", "dev-insecure-state-secret")
 
 
+@functools.cache
 def _lazy_import_google_flow():
     from google_auth_oauthlib.flow import Flow  # type: ignore
     return Flow
 
 
+@functools.cache
 def _lazy_import_google_requests():
     from google.auth.transport.requests import Request  # type: ignore
     return Request
 
 
+@functools.cache
 def _lazy_import_build():
     from googleapiclient.discovery import build  # type: ignore
     return build
 
 
+@functools.cache
+def _lazy_import_authorized_http():
+    from google_auth_httplib2 import AuthorizedHttp  # type: ignore
+    return AuthorizedHttp
+
+
+@functools.cache
 def _lazy_import_media_upload():
     from googleapiclient.http import MediaIoBaseUpload  # type: ignore
     return MediaIoBaseUpload
 
 
+@functools.cache
 def _lazy_import_credentials():
     from google.oauth2.credentials import Credentials  # type: ignore
     return Credentials
 
 
+@functools.cache
 def _lazy_import_service_account_credentials():
     from google.oauth2.service_account import Credentials as SACredentials  # type: ignore
     return SACredentials
 
 
+def warmup() -> None:
+    """Resolve every lazily imported Google client module up front.
+
+    Called at API startup so the first Drive request does not pay the import cost.
+    Missing libraries are logged and left for the request path to report.
+    """
+    for importer in (
+        _lazy_import_build,
+        _lazy_import_credentials,
+        _lazy_import_service_account_credentials,
+        _lazy_import_google_requests,
+        _lazy_import_google_flow,
+        _lazy_import_media_download,
+        _lazy_import_media_upload,
+        _lazy_import_authorized_http,
+    ):
+        try:
+            importer()
+        except ImportError as e:
+            log.warning(f"Google client warmup skipped {importer.__name__}: {e}")
+
+
+# OAuth state is authenticated with keyed BLAKE2b (a MAC by construction, single pass).
+# BLAKE2b keys are at most 64 bytes, so longer secrets are hashed down to fit.
+_STATE_MAC_SIZE = 16
+_SECRET_BYTES = OAUTH_STATE_SECRET.encode()
+if len(_SECRET_BYTES) > hashlib.blake2b.MAX_KEY_SIZE:
+    _SECRET_BYTES = hashlib.blake2b(_SECRET_BYTES).digest()
+
+
+def _state_mac(raw: bytes) -> bytes:
+    return hashlib.blake2b(raw, key=_SECRET_BYTES, digest_size=_STATE_MAC_SIZE).digest()
+
+try:
+    import orjson
+
+    _state_dumps = orjson.dumps
+    _state_loads = orjson.loads
+except ImportError:  # orjson is in requirements.txt; keep stdlib json as a fallback
+    def _state_dumps(data: Dict[str, Any]) -> bytes:
+        return json.dumps(data, separators=(",", ":")).encode()
+
+    _state_loads = json.loads
+
+
 def sign_state(payload: Dict[str, Any], ttl_seconds: int = 600) -> str:
     """Create a signed, base64-encoded state string with expiry.
 
-    payload is augmented with exp timestamp. Returns url-safe base64 string of JSON + HMAC.
+    payload is augmented with exp timestamp. Returns url-safe base64 string of JSON + MAC.
     """
     data = dict(payload)
     data["exp"] = int(time.time()) + ttl_seconds
-    raw = json.dumps(data, separators=(",", ":")).encode()
-    mac = hmac.new(OAUTH_STATE_SECRET.encode(), raw, hashlib.sha256).digest()
-    token = base64.urlsafe_b64encode(raw + b"." + mac).decode()
-    return token
+    raw = _state_dumps(data)
+    mac = _state_mac(raw)
+    buf = bytearray(raw)
+    buf.append(0x2E)  # "."
+    buf.extend(mac)
+    # Padding is implied by the length and re-added in verify_state
+    return base64.urlsafe_b64encode(buf).rstrip(b"=").decode("ascii")
 
 
 def verify_state(token: str) -> Dict[str, Any]:
     try:
-        blob = base64.urlsafe_b64decode(token.encode())
-        raw, mac = blob.rsplit(b".", 1)
-        expected = hmac.new(OAUTH_STATE_SECRET.encode(), raw, hashlib.sha256).digest()
+        blob = base64.urlsafe_b64decode(token.encode("ascii") + b"=" * (-len(token) % 4))
+        # Fixed-size MAC at the end, preceded by a "." separator. Slicing rather than
+        # splitting on "." keeps MACs that happen to contain a 0x2E byte verifiable.
+        if len(blob) <= _STATE_MAC_SIZE + 1 or blob[-_STATE_MAC_SIZE - 1] != 0x2E:
+            raise ValueError("malformed state")
+        raw, mac = blob[:-_STATE_MAC_SIZE - 1], blob[-_STATE_MAC_SIZE:]
+        expected = _state_mac(raw)
         if not hmac.compare_digest(expected, mac):
             raise ValueError("invalid signature")
-        data = json.loads(raw.decode())
+        data = _state_loads(raw)
         if int(time.time()) > int(data.get("exp", 0)):
             raise ValueError("state expired")
         return data
@@ -137,6 +270,56 @@ def verify_state(token: str) -> Dict[str, Any]:
 
 TOK_TABLE = "google_drive_tokens"
 
+# Credentials objects per user_id, so valid tokens are served without a Supabase round-trip.
+# Expired entries are refreshed in place from the cached refresh token.
+CREDS_CACHE_TTL_SECONDS = 1800
+_CREDS_CACHE = TTLCache(maxsize=10_000, ttl=CREDS_CACHE_TTL_SECONDS)
+# Access token last loaded from or written to Supabase per user_id. A cached Credentials
+# whose token differs was refreshed in place (e.g. by AuthorizedHttp) and is persisted again.
+_PERSISTED_TOKENS = TTLCache(maxsize=10_000, ttl=CREDS_CACHE_TTL_SECONDS)
+# Cached tokens this close to expiry are refreshed rather than handed out.
+CREDS_EXPIRY_SKEW_SECONDS = 60
+
+
+def _token_fresh(creds) -> bool:
+    """True when creds hold an access token that is not within the skew window of expiring."""
+    if not creds.valid:
+        return False
+    if creds.expiry is None:
+        # Unknown lifetime (e.g. stored without expiry): refresh once to learn it
+        return not creds.refresh_token
+    # google-auth keeps expiry as a naive UTC datetime
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return (creds.expiry - now).total_seconds() > CREDS_EXPIRY_SKEW_SECONDS
+
+
+def invalidate_credentials(user_id: str) -> None:
+    """Forget cached credentials and Drive client for a user (sign-out, re-auth, revocation)."""
+    _CREDS_CACHE.pop(str(user_id))
+    _PERSISTED_TOKENS.pop(str(user_id))
+    _USER_DRIVE_SERVICES.pop(str(user_id))
+
+
+def creds_to_dict(creds) -> Dict[str, Any]:
+    """Serialize OAuth Credentials to the dict shape Credentials.to_json() produces.
+
+    Built straight from the attributes, skipping the JSON string round-trip; the result
+    loads back with Credentials.from_authorized_user_info.
+    """
+    data = {
+        "token": creds.token,
+        "refresh_token": creds.refresh_token,
+        "token_uri": creds.token_uri,
+        "client_id": creds.client_id,
+        "client_secret": creds.client_secret,
+        "scopes": list(creds.scopes) if creds.scopes else None,
+        "universe_domain": getattr(creds, "universe_domain", None),
+        "account": getattr(creds, "account", None),
+        "expiry": creds.expiry.isoformat() + "Z" if creds.expiry else None,
+    }
+    # to_json() omits unset fields as well
+    return {k: v for k, v in data.items() if v is not None}
+
 
 def save_credentials(user_id: str, credentials_json: Dict[str, Any]) -> None:
     """Upsert credentials for user into Supabase."""
@@ -150,38 +333,143 @@ def save_credentials(user_id: str, credentials_json: Dict[str, Any]) -> None:
             },
             on_conflict="user_id",
         ).execute()
+        # Drop cached credentials and any Drive client built from them
+        invalidate_credentials(user_id)
     except Exception as e:
         log.error(f"Failed to persist credentials for user {user_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to persist credentials: {e}")
 
 
-def load_credentials(user_id: str):
+class _CredentialWriter:
+    """Background thread that coalesces refreshed-token upserts into batched writes.
+
+    Token refreshes only need to be persisted eventually (the refreshed Credentials are
+    already valid in memory), so instead of one blocking upsert per refresh, rows are
+    queued and flushed every FLUSH_INTERVAL seconds or MAX_BATCH rows in one array upsert.
+    """
+
+    FLUSH_INTERVAL = 0.2
+    MAX_BATCH = 32
+
+    def __init__(self) -> None:
+        self._queue: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, user_id: str, credentials_json: Dict[str, Any]) -> None:
+        self._ensure_started()
+        self._queue.put((str(user_id), credentials_json))
+
+    def write_now(self, user_id: str, credentials_json: Dict[str, Any]) -> None:
+        """Upsert one user's credentials immediately on the calling thread."""
+        self._write({str(user_id): credentials_json})
+
+    def flush(self) -> None:
+        """Synchronously write everything still queued (used at interpreter shutdown)."""
+        while True:
+            rows = self._collect(timeout=0)
+            if not rows:
+                return
+            self._write(rows)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name="credential-writer", daemon=True)
+                thread.start()
+                self._thread = thread
+                atexit.register(self.flush)
+
+    def _collect(self, timeout: float) -> Dict[str, Dict[str, Any]]:
+        # Keyed by user_id: a batch upsert may not touch the same conflict key twice,
+        # and only the newest credentials for a user matter.
+        rows: Dict[str, Dict[str, Any]] = {}
+        deadline = time.monotonic() + timeout
+        while len(rows) < self.MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    user_id, credentials_json = self._queue.get(timeout=remaining)
+                else:
+                    user_id, credentials_json = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            rows[user_id] = credentials_json
+        return rows
+
+    def _run(self) -> None:
+        while True:
+            user_id, credentials_json = self._queue.get()
+            rows = {user_id: credentials_json}
+            rows.update(self._collect(timeout=self.FLUSH_INTERVAL))
+            self._write(rows)
+
+    def _write(self, rows: Dict[str, Dict[str, Any]]) -> None:
+        now = int(time.time())
+        payload = [
+            {"user_id": user_id, "credentials": credentials_json, "updated_at": now}
+            for user_id, credentials_json in rows.items()
+        ]
+        try:
+            get_supabase().table(TOK_TABLE).upsert(payload, on_conflict="user_id").execute()
+        except Exception as e:
+            log.error(f"Failed to persist refreshed credentials for {len(payload)} user(s): {e}")
+
+
+_credential_writer = _CredentialWriter()
+
+
+def _persist_refreshed(user_id: str, creds, background_tasks: Optional["BackgroundTasks"]) -> None:
+    """Write refreshed credentials back to Supabase off the request path."""
+    refreshed = creds_to_dict(creds)
+    if background_tasks is not None:
+        background_tasks.add_task(_credential_writer.write_now, str(user_id), refreshed)
+    else:
+        _credential_writer.submit(user_id, refreshed)
+    _PERSISTED_TOKENS.set(str(user_id), creds.token)
+
+
+def load_credentials(user_id: str, background_tasks: Optional["BackgroundTasks"] = None):
     """Load credentials for user and return google.oauth2.credentials.Credentials.
 
-    Refreshes tokens if needed and persists the refreshed tokens.
+    Served from an in-process cache while the tokens are valid. Refreshes tokens if needed;
+    refreshed tokens are persisted after the response when the caller passes its
+    BackgroundTasks, otherwise they are queued for the batched background writer.
     """
+    creds = _CREDS_CACHE.get(str(user_id))
+    if creds is not None and _token_fresh(creds):
+        if creds.token != _PERSISTED_TOKENS.get(str(user_id)):
+            # Refreshed in place by a Drive client's AuthorizedHttp since it was last saved
+            _persist_refreshed(user_id, creds, background_tasks)
+        return creds
     Credentials = _lazy_import_credentials()
     Request = _lazy_import_google_requests()
     try:
-        res = (
-            get_supabase().table(TOK_TABLE)
-            .select("credentials")
-            .eq("user_id", str(user_id))
-            .maybe_single()
-            .execute()
-        )
-        row = getattr(res, "data", None) or {}
-        info = row.get("credentials") if isinstance(row, dict) else None
-        if not info:
-            raise HTTPException(status_code=401, detail="Google Drive not authorized for this user")
-
-        creds = Credentials.from_authorized_user_info(info, scopes=DRIVE_SCOPES)
-        if not creds.valid:
+        if creds is None:
+            res = (
+                get_supabase().table(TOK_TABLE)
+                .select("credentials")
+                .eq("user_id", str(user_id))
+                .maybe_single()
+                .execute()
+            )
+            row = getattr(res, "data", None) or {}
+            info = row.get("credentials") if isinstance(row, dict) else None
+            if not info:
+                raise HTTPException(status_code=401, detail="Google Drive not authorized for this user")
+            creds = Credentials.from_authorized_user_info(info, scopes=DRIVE_SCOPES)
+            _PERSISTED_TOKENS.set(str(user_id), creds.token)
+
+        # Only talk to Google's token endpoint when the access token is about to lapse;
+        # a still-fresh token from Supabase is used as-is and nothing is written back.
+        if not _token_fresh(creds):
             if creds.refresh_token:
                 try:
                     creds.refresh(Request())
-                    # Persist refreshed tokens
-                    save_credentials(user_id, json.loads(creds.to_json()))
+                    # Persist refreshed tokens off the request path
+                    _persist_refreshed(user_id, creds, background_tasks)
                 except Exception as e:
                     msg = str(e)
                     # If the refresh fails due to invalid_grant, clear stored creds and force re-auth
@@ -190,10 +478,12 @@ def load_credentials(user_id: str):
                             get_supabase().table(TOK_TABLE).delete().eq("user_id", str(user_id)).execute()
                         except Exception:
                             pass
+                        invalidate_credentials(user_id)
                         raise HTTPException(status_code=401, detail="Google Drive authorization expired or revoked; please re-authorize.")
                     raise HTTPException(status_code=500, detail=f"Failed to refresh Google tokens: {e}")
-            else:
+            elif not creds.valid:
                 raise HTTPException(status_code=401, detail="Missing refresh token; re-authorize required")
+        _CREDS_CACHE.set(str(user_id), creds)
         return creds
     except HTTPException:
         raise
@@ -216,14 +506,84 @@ def build_flow(redirect_uri: str):
 
 # ---------------- Drive/Docs operations ----------------
 
+DRIVE_HTTP_TIMEOUT = 30
+_HTTP_LOCAL = threading.local()
+
+
+class _ThreadLocalHttp:
+    """httplib2.Http stand-in that keeps one connection pool per thread.
+
+    Every Drive/Docs client shares this transport, so connections to www.googleapis.com
+    are reused across services and users instead of each build() opening its own.
+    httplib2.Http is not thread-safe, hence one instance per worker thread.
+    """
+
+    def _http(self):
+        http = getattr(_HTTP_LOCAL, "http", None)
+        if http is None:
+            import httplib2  # type: ignore
+
+            http = httplib2.Http(timeout=DRIVE_HTTP_TIMEOUT)
+            # Same as googleapiclient's build_http: resumable uploads use 308 as "resume incomplete".
+            http.redirect_codes = http.redirect_codes - {308}
+            _HTTP_LOCAL.http = http
+        return http
+
+    def request(self, *args, **kwargs):
+        return self._http().request(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._http(), name)
+
+
+_SHARED_HTTP = _ThreadLocalHttp()
+
+
+def _authed_http(credentials) -> Any:
+    AuthorizedHttp = _lazy_import_authorized_http()
+    return AuthorizedHttp(credentials, http=_SHARED_HTTP)
+
+
+@functools.cache
+def _discovery_document(api: str, version: str) -> Optional[Dict[str, Any]]:
+    """Parsed discovery document bundled with googleapiclient, loaded once per API."""
+    try:
+        from googleapiclient.discovery_cache import get_static_doc  # type: ignore
+    except ImportError:
+        return None
+    doc = get_static_doc(api, version)
+    return json.loads(doc) if doc else None
+
+
+# Built clients keyed by (api, version, id(credentials)). The credentials object is kept
+# alongside so a recycled id() can't hand out another user's client; credentials that
+# refresh in place keep their entry since AuthorizedHttp reads the token per request.
+_SERVICES_BY_CREDS = TTLCache(maxsize=256, ttl=CREDS_CACHE_TTL_SECONDS)
+
+
+def _build_service(api: str, version: str, credentials) -> Any:
+    key = (api, version, id(credentials))
+    cached = _SERVICES_BY_CREDS.get(key)
+    if cached is not None and cached[0] is credentials:
+        return cached[1]
+    document = _discovery_document(api, version)
+    if document is not None:
+        from googleapiclient.discovery import build_from_document  # type: ignore
+
+        service = build_from_document(document, http=_authed_http(credentials))
+    else:
+        build = _lazy_import_build()
+        service = build(api, version, http=_authed_http(credentials))
+    _SERVICES_BY_CREDS.set(key, (credentials, service))
+    return service
+
+
 def build_drive_service(credentials) -> Any:
-    build = _lazy_import_build()
-    return build("drive", "v3", credentials=credentials)
+    return _build_service("drive", "v3", credentials)
 
 
 def build_docs_service(credentials) -> Any:
-    build = _lazy_import_build()
-    return build("docs", "v1", credentials=credentials)
+    return _build_service("docs", "v1", credentials)
 
 
 # ---------------- Server (service account) Drive helpers ----------------
@@ -234,24 +594,83 @@ SERVER_DRIVE_SCOPES = [
 ]
 
 
+# Service account credentials are loaded once per key file and reused; they refresh
+# their own bearer token, so there is no need to re-read and re-parse the key per call.
+_SA_CREDS: Optional[Any] = None
+_SA_CREDS_PATH: Optional[str] = None
+_SA_LOCK = threading.Lock()
+
+
 def get_service_account_credentials():
     """Load service account credentials for the server-owned Drive.
 
     The service account file path can be overridden with env GOOGLE_SERVER_SERVICE_ACCOUNT_PATH.
+    The credentials object is cached and reloaded only when that path changes.
     """
-    SACredentials = _lazy_import_service_account_credentials()
+    global _SA_CREDS, _SA_CREDS_PATH
     json_path = os.environ.get("GOOGLE_SERVER_SERVICE_ACCOUNT_PATH", SERVER_SERVICE_ACCOUNT_PATH)
-    try:
-        creds = SACredentials.from_service_account_file(json_path, scopes=SERVER_DRIVE_SCOPES)
+    creds = _SA_CREDS
+    if creds is not None and _SA_CREDS_PATH == json_path:
+        return creds
+    with _SA_LOCK:
+        if _SA_CREDS is not None and _SA_CREDS_PATH == json_path:
+            return _SA_CREDS
+        SACredentials = _lazy_import_service_account_credentials()
+        try:
+            creds = SACredentials.from_service_account_file(json_path, scopes=SERVER_DRIVE_SCOPES)
+        except Exception as e:
+            log.error(f"Failed to load service account credentials: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to load server Drive credentials: {e}")
+        _SA_CREDS, _SA_CREDS_PATH = creds, json_path
         return creds
-    except Exception as e:
-        log.error(f"Failed to load service account credentials: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to load server Drive credentials: {e}")
 
-def build_server_drive_service() -> Any:
-    """Build a Drive service client authenticated as the server's service account."""
+# Process-wide server Drive/Docs clients. Reusing the Resource keeps its HTTP transport,
+# so the TCP+TLS connection to www.googleapis.com survives across requests.
+_SERVER_SERVICES: Dict[str, Tuple[Any, Any]] = {}
+_SERVER_SERVICES_LOCK = threading.Lock()
+
+
+def _cached_server_service(api: str, builder) -> Any:
     creds = get_service_account_credentials()
-    return build_drive_service(creds)
+    cached = _SERVER_SERVICES.get(api)
+    if cached is not None and cached[0] is creds:
+        return cached[1]
+    with _SERVER_SERVICES_LOCK:
+        cached = _SERVER_SERVICES.get(api)
+        if cached is not None and cached[0] is creds:
+            return cached[1]
+        service = builder(creds)
+        _SERVER_SERVICES[api] = (creds, service)
+        return service
+
+
+def build_server_drive_service() -> Any:
+    """Return the Drive service client authenticated as the server's service account."""
+    return _cached_server_service("drive", build_drive_service)
+
+
+def build_server_docs_service() -> Any:
+    """Return the Docs service client authenticated as the server's service account."""
+    return _cached_server_service("docs", build_docs_service)
+
+
+# Per-user Drive clients with the Credentials they were built from. Entries never outlive
+# the credentials cache, and a client is only reused while load_credentials still returns
+# the very same Credentials object.
+_USER_DRIVE_SERVICES = TTLCache(maxsize=512, ttl=CREDS_CACHE_TTL_SECONDS)
+
+
+def get_user_drive_service(user_id: str, background_tasks: Optional["BackgroundTasks"] = None) -> Any:
+    """Return a Drive client for the user's OAuth credentials, reusing a recent one if cached."""
+    key = str(user_id)
+    # Cheap on a cache hit; also refreshes near-expiry tokens and persists in-place refreshes
+    creds = load_credentials(key, background_tasks)
+    cached = _USER_DRIVE_SERVICES.get(key)
+    if cached is not None and cached[0] is creds:
+        return cached[1]
+    service = build_drive_service(creds)
+    _USER_DRIVE_SERVICES.set(key, (creds, service))
+    return service
 
 def copy_file_to_server_drive(server_drive_service, source_file_id: str, new_name: str) -> Dict[str, Any]:
     """Copy a file the service account can access into the server's Drive.
@@ -272,24 +691,37 @@ def copy_file_to_server_drive(server_drive_service, source_file_id: str, new_nam
         raise HTTPException(status_code=500, detail=f"Failed to copy file to server Drive: {e}")
 
 
-def download_file_bytes(drive_service, file_id: str) -> bytes:
-    """Download raw bytes of a file (non-Google types) from Drive."""
+def _download_media(request) -> io.BytesIO:
+    """Stream a media request (get_media / export_media) into a BytesIO rewound to the start."""
     MediaIoBaseDownload = _lazy_import_media_download()
-    import io
+    fh = io.BytesIO()
+    downloader = MediaIoBaseDownload(fh, request, chunksize=DRIVE_CHUNK_SIZE)
+    done = False
+    while not done:
+        status, done = downloader.next_chunk()
+    fh.seek(0)
+    return fh
+
+
+def download_file_stream(drive_service, file_id: str) -> io.BytesIO:
+    """Download a file (non-Google types) from Drive into a BytesIO rewound to the start.
 
+    The buffer can be handed straight to upload_bytes_as_google_doc / upload_bytes_raw
+    without materializing an intermediate bytes copy.
+    """
     try:
         # include supportsAllDrives=True in case the file lives on a shared drive
         request = drive_service.files().get_media(fileId=file_id, supportsAllDrives=True)
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, request)
-        done = False
-        while not done:
-            status, done = downloader.next_chunk()
-        return fh.getvalue()
+        return _download_media(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to download file: {e}")
 
 
+def download_file_bytes(drive_service, file_id: str) -> bytes:
+    """Download raw bytes of a file (non-Google types) from Drive."""
+    return bytes(download_file_stream(drive_service, file_id).getbuffer())
+
+
 def get_file_metadata(drive_service, file_id: str, fields: str = "id, name, mimeType") -> Dict[str, Any]:
     try:
         # Always allow reading metadata from shared drives as well
@@ -298,16 +730,22 @@ def get_file_metadata(drive_service, file_id: str, fields: str = "id, name, mime
         raise HTTPException(status_code=404, detail=f"Failed to read file metadata: {e}")
 
 
-def upload_bytes_as_google_doc(server_drive_service, content: bytes, source_mime: str, name: str) -> Dict[str, Any]:
+def _media_upload(content: Union[bytes, io.BytesIO], mimetype: str):
+    """Build the upload body: a single POST for small files, chunked resumable upload above the threshold."""
+    MediaIoBaseUpload = _lazy_import_media_upload()
+    stream = content if isinstance(content, io.BytesIO) else io.BytesIO(content)
+    if stream.getbuffer().nbytes <= RESUMABLE_UPLOAD_THRESHOLD:
+        return MediaIoBaseUpload(stream, mimetype=mimetype, resumable=False)
+    return MediaIoBaseUpload(stream, mimetype=mimetype, chunksize=DRIVE_CHUNK_SIZE, resumable=True)
+
+
+def upload_bytes_as_google_doc(server_drive_service, content: Union[bytes, io.BytesIO], source_mime: str, name: str) -> Dict[str, Any]:
     """Upload given bytes to the server Drive and convert into a Google Doc.
 
     The file is created with mimeType=application/vnd.google-apps.document to trigger conversion.
     """
-    MediaIoBaseUpload = _lazy_import_media_upload()
-    import io
-
     try:
-        media = MediaIoBaseUpload(io.BytesIO(content), mimetype=source_mime, resumable=False)
+        media = _media_upload(content, source_mime)
         # Place the created Google Doc inside the designated Shared Drive folder so the
         # server's service account (content manager) owns/manages the stored resume.
         body = {
@@ -325,13 +763,10 @@ def upload_bytes_as_google_doc(server_drive_service, content: bytes, source_mime
         raise HTTPException(status_code=500, detail=f"Failed to upload and convert to Google Doc: {e}")
 
 
-def upload_bytes_raw(server_drive_service, content: bytes, source_mime: str, name: str) -> Dict[str, Any]:
+def upload_bytes_raw(server_drive_service, content: Union[bytes, io.BytesIO], source_mime: str, name: str) -> Dict[str, Any]:
     """Upload given bytes to the server Drive without conversion (keeps original mime)."""
-    MediaIoBaseUpload = _lazy_import_media_upload()
-    import io
-
     try:
-        media = MediaIoBaseUpload(io.BytesIO(content), mimetype=source_mime, resumable=False)
+        media = _media_upload(content, source_mime)
         # Upload into the shared drive folder to avoid quota and ownership issues.
         body = {"name": name, "parents": [SHARED_DRIVE_FOLDER_ID]}
         created = (
@@ -376,26 +811,22 @@ def export_google_doc_text(drive_service, file_id: str) -> str:
         if mime == "application/vnd.google-apps.document":
             try:
                 # Preferred: include supportsAllDrives for shared-drive support
-                data = drive_service.files().export(fileId=file_id, mimeType="text/plain", supportsAllDrives=True).execute()
+                request = drive_service.files().export_media(fileId=file_id, mimeType="text/plain", supportsAllDrives=True)
             except TypeError:
                 # Some googleapiclient versions don't accept supportsAllDrives on export()
                 # Retry without the kwarg (best-effort fallback).
                 log.info("export() does not accept supportsAllDrives param, retrying without it", extra={"file_id": file_id})
-                data = drive_service.files().export(fileId=file_id, mimeType="text/plain").execute()
+                request = drive_service.files().export_media(fileId=file_id, mimeType="text/plain")
         else:
-            # Non-Google files -> download media. alt="media" returns bytes for binary/text files.
+            # Non-Google files -> download media.
             try:
-                data = drive_service.files().get(fileId=file_id, alt="media", supportsAllDrives=True).execute()
+                request = drive_service.files().get_media(fileId=file_id, supportsAllDrives=True)
             except TypeError:
                 # Fallback if the client doesn't accept supportsAllDrives here (rare)
-                log.info("get(..., alt='media') does not accept supportsAllDrives param, retrying without it", extra={"file_id": file_id})
-                data = drive_service.files().get(fileId=file_id, alt="media").execute()
-
-        if isinstance(data, bytes):
-            return data.decode("utf-8", errors="ignore")
-        if isinstance(data, str):
-            return data
-        return ""
+                log.info("get_media() does not accept supportsAllDrives param, retrying without it", extra={"file_id": file_id})
+                request = drive_service.files().get_media(fileId=file_id)
+
+        return _download_media(request).getbuffer().tobytes().decode("utf-8", errors="ignore")
     except Exception as e:
         # Surface a clearer error to the caller including file id and known mime (if available).
         try:
@@ -410,66 +841,110 @@ def export_google_doc_bytes(drive_service, file_id: str, export_mime: str) -> by
     try:
         # Call export without supportsAllDrives for compatibility with googleapiclient versions
         # that do not accept that kwarg on files().export().
-        data = drive_service.files().export(fileId=file_id, mimeType=export_mime).execute()
-
-        if isinstance(data, bytes):
-            return data
-        if isinstance(data, str):
-            return data.encode("utf-8")
-        return b""
+        request = drive_service.files().export_media(fileId=file_id, mimeType=export_mime)
+        return _download_media(request).getbuffer().tobytes()
     except Exception as e:
         # Bubble a clearer message so the router can log context
         raise HTTPException(status_code=500, detail=f"Failed to export Google Doc as {export_mime}: {e}")
 
 
-def _extract_text_with_index_map(doc: Dict[str, Any]) -> Tuple[str, List[int]]:
-    """Return the document text and a map from text index to Docs API index."""
-    chars: List[str] = []
-    indices: List[int] = []
+# documents.get field mask covering exactly what _extract_text_with_index_map reads;
+# table cells and the table of contents nest further structural elements.
+_DOC_TEXT_FIELDS = (
+    "body/content(paragraph/elements(startIndex,textRun/content),"
+    "table/tableRows/tableCells/content,tableOfContents/content)"
+)
 
-    def visit(elements: Optional[List[Dict[str, Any]]]) -> None:
-        if not elements:
-            return
-        for element in elements:
-            paragraph = element.get("paragraph")
-            if paragraph:
-                for para_element in paragraph.get("elements", []):
-                    start = para_element.get("startIndex")
-                    text_run = para_element.get("textRun")
-                    if start is None or not text_run:
-                        continue
-                    text = text_run.get("content", "")
-                    for offset, ch in enumerate(text):
-                        chars.append(ch)
-                        indices.append(start + offset)
-            table = element.get("table")
-            if table:
-                for row in table.get("tableRows", []):
-                    for cell in row.get("tableCells", []):
-                        visit(cell.get("content"))
-            table_of_contents = element.get("tableOfContents")
-            if table_of_contents:
-                visit(table_of_contents.get("content"))
-
-    visit(doc.get("body", {}).get("content"))
-    return "".join(chars), indices
-
-
-def _find_text_occurrences(doc: Dict[str, Any], search_text: str) -> List[Tuple[int, int]]:
+
+def _extract_text_with_index_map(doc: Dict[str, Any]) -> Tuple[str, List[int], List[int]]:
+    """Return the document text plus per-run offsets for mapping back to Docs API indices.
+
+    Returns (full_text, text_offsets, doc_starts): text run i begins at
+    full_text[text_offsets[i]] and at Docs index doc_starts[i]. Use _doc_index to map
+    a position in full_text to its Docs API index.
+    """
+    parts: List[str] = []
+    text_offsets: List[int] = []
+    doc_starts: List[int] = []
+    offset = 0
+
+    # Explicit stack of element iterators instead of recursing into tables/TOC. Nested
+    # content is pushed on top of the current iterator so text stays in document order.
+    stack = [iter(doc.get("body", {}).get("content") or ())]
+    while stack:
+        element = next(stack[-1], None)
+        if element is None:
+            stack.pop()
+            continue
+        paragraph = element.get("paragraph")
+        if paragraph:
+            for para_element in paragraph.get("elements", []):
+                start = para_element.get("startIndex")
+                text_run = para_element.get("textRun")
+                if start is None or not text_run:
+                    continue
+                text = text_run.get("content", "")
+                if not text:
+                    continue
+                parts.append(text)
+                text_offsets.append(offset)
+                doc_starts.append(start)
+                offset += len(text)
+        nested = []
+        table = element.get("table")
+        if table:
+            for row in table.get("tableRows", []):
+                for cell in row.get("tableCells", []):
+                    nested.append(cell.get("content") or ())
+        table_of_contents = element.get("tableOfContents")
+        if table_of_contents:
+            nested.append(table_of_contents.get("content") or ())
+        stack.extend(iter(content) for content in reversed(nested))
+
+    return "".join(parts), text_offsets, doc_starts
+
+
+def _doc_index(text_offsets: List[int], doc_starts: List[int], pos: int) -> int:
+    """Map a position in the extracted text to its Docs API index."""
+    run = bisect.bisect_right(text_offsets, pos) - 1
+    return doc_starts[run] + (pos - text_offsets[run])
+
+
+def _find_text_occurrences(
+    doc: Dict[str, Any], search_text: str, limit: Optional[int] = None
+) -> List[Tuple[int, int]]:
+    """Docs API ranges of search_text, stopping after `limit` matches when given."""
     if not search_text:
         return []
-    full_text, index_map = _extract_text_with_index_map(doc)
-    occurrences: List[Tuple[int, int]] = []
-    start_pos = 0
-    while True:
-        pos = full_text.find(search_text, start_pos)
-        if pos == -1:
-            break
-        start_index = index_map[pos]
-        end_index = index_map[pos + len(search_text) - 1] + 1
-        occurrences.append((start_index, end_index))
-        start_pos = pos + len(search_text)
-    return occurrences
+    full_text, text_offsets, doc_starts = _extract_text_with_index_map(doc)
+    matches = itertools.islice(re.finditer(re.escape(search_text), full_text), limit)
+    return [
+        (
+            _doc_index(text_offsets, doc_starts, m.start()),
+            _doc_index(text_offsets, doc_starts, m.end() - 1) + 1,
+        )
+        for m in matches
+    ]
+
+
+def _replace_all_text(docs_service, file_id: str, search_text: str, replace_text: str) -> Tuple[int, Dict[str, Any]]:
+    """Run a single replaceAllText batchUpdate; returns (occurrencesChanged, raw result)."""
+    requests = [
+        {
+            "replaceAllText": {
+                "containsText": {"text": search_text, "matchCase": True},
+                "replaceText": replace_text,
+            }
+        }
+    ]
+    result = (
+        docs_service.documents()
+        .batchUpdate(documentId=file_id, body={"requests": requests})
+        .execute()
+    )
+    replies = result.get("replies") or [{}]
+    changed = int((replies[0].get("replaceAllText") or {}).get("occurrencesChanged", 0))
+    return changed, result
 
 
 def update_file_content(
@@ -480,50 +955,50 @@ def update_file_content(
     replace_text: str,
     replace_all: bool = False,
 ) -> Dict[str, Any]:
-    """Replace text within a Google Doc while preserving formatting."""
+    """Replace text within a Google Doc while preserving formatting.
+
+    replace_all goes straight to replaceAllText and reports the match count from its
+    reply; replacing a single occurrence needs the document fetched to locate it.
+    """
     if not search_text:
         raise HTTPException(status_code=400, detail="search_text is required")
-    try:
-        meta = (
-            drive_service.files()
-            .get(fileId=file_id, fields="id, name, mimeType", supportsAllDrives=True)
-            .execute()
-        )
-        mime = meta.get("mimeType")
-    except Exception as e:
-        raise HTTPException(status_code=404, detail=f"File not found: {e}")
 
-    if mime != "application/vnd.google-apps.document":
-        raise HTTPException(status_code=400, detail="Search/replace is only supported for Google Docs")
+    if replace_all:
+        try:
+            changed, result = _replace_all_text(docs_service, file_id, search_text, replace_text)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to update Google Doc: {e}")
+        if not changed:
+            return {"updated": False, "matches": 0, "message": "Text not found"}
+        return {"updated": True, "matches": changed, "method": "replaceAllText", "result": result}
 
     try:
         # Docs API doesn't accept supportsAllDrives; access is governed by Drive permissions
-        doc = docs_service.documents().get(documentId=file_id).execute()
+        doc = docs_service.documents().get(documentId=file_id, fields=_DOC_TEXT_FIELDS).execute()
     except Exception as e:
+        # Only consult Drive metadata on failure, to report a missing file or non-Doc type
+        # precisely; a successful documents.get already proves this is a Google Doc.
+        try:
+            meta = (
+                drive_service.files()
+                .get(fileId=file_id, fields="id, name, mimeType", supportsAllDrives=True)
+                .execute()
+            )
+        except Exception as meta_error:
+            raise HTTPException(status_code=404, detail=f"File not found: {meta_error}")
+        if meta.get("mimeType") != "application/vnd.google-apps.document":
+            raise HTTPException(status_code=400, detail="Search/replace is only supported for Google Docs")
         raise HTTPException(status_code=500, detail=f"Failed to load document: {e}")
 
-    occurrences = _find_text_occurrences(doc, search_text)
+    # Only the first match is replaced, so the scan stops there
+    occurrences = _find_text_occurrences(doc, search_text, limit=1)
     if not occurrences:
         return {"updated": False, "matches": 0, "message": "Text not found"}
 
     try:
-        if replace_all:
-            requests = [
-                {
-                    "replaceAllText": {
-                        "containsText": {"text": search_text, "matchCase": True},
-                        "replaceText": replace_text,
-                    }
-                }
-            ]
-            result = (
-                docs_service.documents()
-                .batchUpdate(documentId=file_id, body={"requests": requests})
-                .execute()
-            )
-            return {"updated": True, "matches": len(occurrences), "method": "replaceAllText", "result": result}
-
         # Replace only the first occurrence using a temporary named range to preserve formatting.
+        # replaceAllText is not used here even for a lone body match: it also rewrites
+        # identical text in headers, footers and footnotes.
         start_index, end_index = occurrences[0]
         range_name = f"replace_{uuid.uuid4().hex}"
         requests = [
@@ -553,21 +1028,24 @@ def update_file_content(
         raise HTTPException(status_code=500, detail=f"Failed to update Google Doc: {e}")
 
 
+_WORD_RE = re.compile(r"[a-z']+", re.IGNORECASE | re.ASCII)
+_STOPWORDS = frozenset({
+    "the","a","an","and","or","but","is","are","to","of","in","on","for","with","as","by","at","it","this","that","be","was","were","from","your","you","we","our",
+})
+
+
 def basic_analyze_text(text: str) -> Dict[str, Any]:
     """Very simple analysis: word count and naive keyword frequency."""
-    import re
-    from collections import Counter
-
-    words = re.findall(r"[A-Za-z']+", text.lower())
-    stop = {
-        "the","a","an","and","or","but","is","are","to","of","in","on","for","with","as","by","at","it","this","that","be","was","were","from","your","you","we","our",
-    }
-    filtered = [w for w in words if w not in stop and len(w) > 2]
-    counts = Counter(filtered)
-    keywords = counts.most_common(10)
+    # One pass over the matches; lowercase per token rather than copying the whole text first
+    counts: Counter = Counter()
+    total = 0
+    for match in _WORD_RE.finditer(text):
+        total += 1
+        word = match.group().lower()
+        if len(word) > 2 and word not in _STOPWORDS:
+            counts[word] += 1
     return {
-        "word_count": len(words),
-        "unique_words": len(set(filtered)),
-        "top_keywords": keywords,
+        "word_count": total,
+        "unique_words": len(counts),
+        "top_keywords": counts.most_common(10),
     }
-
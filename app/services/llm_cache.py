@@ -0,0 +1,55 @@
+"""Exact-match response cache for deterministic LLM calls.
+
+Calls made at low temperature with the same model, messages and settings produce
+(near-)identical output, so their responses are kept in process and replayed
+instead of going back to the provider.
+
+Usage:
+    from app.services.llm_cache import llm_cache
+    key = llm_cache.key_for(params)      # None when the call is not cacheable
+    text = llm_cache.get(key) if key else None
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from app.utils.ttl_cache import TTLCache
+
+LLM_CACHE_TTL_SECONDS = float(os.environ.get("LLM_CACHE_TTL_SECONDS", 24 * 3600))
+# Calls above this temperature are sampled on purpose and never cached.
+LLM_CACHE_MAX_TEMPERATURE = 0.2
+
+
+class LLMCache:
+    def __init__(self, maxsize: int = 512, ttl: float = LLM_CACHE_TTL_SECONDS) -> None:
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def key_for(params: Dict[str, Any]) -> Optional[str]:
+        """Cache key for a chat.completions request, or None if it should not be cached.
+
+        Every request parameter (model, messages, temperature, max_tokens, reasoning
+        settings, ...) is part of the key so differently configured calls never collide.
+        """
+        if params.get("stream"):
+            return None
+        temperature = params.get("temperature", 1)
+        if temperature is None or temperature > LLM_CACHE_MAX_TEMPERATURE:
+            return None
+        payload = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    def set(self, key: str, text: str) -> None:
+        self._cache.set(key, text)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+llm_cache = LLMCache()
@@ -2,16 +2,30 @@
 
 import os
 import logging
+import random
+import threading
+import time
 import json
 import datetime
-from openai import OpenAI, APIError
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import re
+import hashlib
+import sqlite3
+import httpx
+import orjson
+from openai import OpenAI, APIError, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
 from dotenv import load_dotenv
 from app import system_prompts
-from typing import List, Type, Tuple, Optional
+from typing import Callable, List, Type, Tuple, Optional, TypeVar
 from app.logging_config import get_logger, bind_logger, configure_logging
 from app.utils.text_cleaning import normalize_to_ascii
+from app.services.llm_cache import llm_cache
+from app.utils.disk_cache import DiskCache, persist_cache
 from app.models.schemas import ResumeHistoryExtraction, ResumeHistoryItem
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
 configure_logging()
 
@@ -21,6 +35,9 @@ load_dotenv(override=True)
 logger = get_logger(__name__)
 # Bind a module-level LoggerAdapter so logs from this module include the agent name
 log = bind_logger(logger, {"agent_name": "llm_service"})
+# Adapters for the per-request hot path, bound once instead of on every call
+_provider_log = bind_logger(logger, {"agent_name": "call llm provider"})
+_structured_log = bind_logger(logger, {"agent_name": "call_llm_with_structured_output"})
 
 # --- Provider and Model Configuration ---
 provider_urls = {
@@ -58,16 +75,18 @@ model_mapping = {
         {"provider": "gemini", "model": "models/gemini-flash-latest"}
     ],
     "resume-professional-summary-extractor": [
+        # Verbatim section extraction: the 8b-instant model is accurate enough and much faster
+        {"provider": "groq", "model": "llama-3.1-8b-instant"},
         {"provider": "groq", "model": "openai/gpt-oss-20b"},
         {"provider": "cerebras", "model": "llama-4-scout-17b-16e-instruct"},
-        {"provider": "groq", "model": "llama-3.1-8b-instant"},
         {"provider": "cerebras", "model": "llama3.1-8b"},
         {"provider": "gemini", "model": "models/gemini-flash-latest"}
     ],
     "resume-skills-extractor": [
+        # Verbatim section extraction: the 8b-instant model is accurate enough and much faster
+        {"provider": "groq", "model": "llama-3.1-8b-instant"},
         {"provider": "groq", "model": "openai/gpt-oss-20b"},
         {"provider": "cerebras", "model": "llama-4-scout-17b-16e-instruct"},
-        {"provider": "groq", "model": "llama-3.1-8b-instant"},
         {"provider": "cerebras", "model": "llama3.1-8b"},
         {"provider": "gemini", "model": "models/gemini-flash-latest"}
     ],
@@ -101,68 +120,446 @@ model_mapping = {
     ]
 }
 
+# (workload, provider) -> the first model_mapping entry for that provider, so picking
+# the requested provider's model is a dict lookup rather than a scan.
+_MODEL_INDEX = {}
+for _workload, _models in model_mapping.items():
+    for _model in _models:
+        _MODEL_INDEX.setdefault((_workload, _model["provider"].lower()), _model)
+del _workload, _models, _model
+
+# Completion budget per workload, sized to the expected output plus headroom for the
+# reasoning tokens gpt-oss models spend first. custom_settings["max_tokens"] still wins.
+DEFAULT_MAX_TOKENS = {
+    "job-description-extractor-agent": 4096,
+    "job-qualifications-extractor-agent": 4096,
+    "resume-professional-summary-extractor": 2048,
+    "resume-skills-extractor": 2048,
+    "resume-summary-extractor": 2048,
+    "resume-history-jobs-extractor": 8192,
+    "professional_summary_rewrite_agent": 4096,
+    "skills-rewriter-agent": 4096,
+    "resume-rewrite-agent": 12000,
+    "resume-match-agent": 12000,
+}
+FALLBACK_MAX_TOKENS = 8192
+
+# Optional Groq service tier (e.g. "performance" on plans that offer it); unset keeps the account default.
+GROQ_SERVICE_TIER = os.environ.get("GROQ_SERVICE_TIER")
+
+# --- Concurrency ---
+# LLM calls are network-bound, so independent agent calls (e.g. summary, skills and
+# job-history extraction of the same resume) run on a shared thread pool and overlap
+# their round-trips instead of adding them up.
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+_llm_pool = concurrent.futures.ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+
+T = TypeVar("T")
+
+
+def run_concurrently(*calls: Callable[[], T]) -> List[T]:
+    """Run independent LLM calls in parallel and return their results in call order.
+
+    Each call is a zero-argument callable, e.g. functools.partial(analyze_job_description, jd).
+    Waits for every call to finish, then re-raises the first failure in call order.
+    """
+    futures = [_llm_pool.submit(call) for call in calls]
+    concurrent.futures.wait(futures)
+    return [future.result() for future in futures]
+
+# --- Persistent extractor cache ---
+# Extractor outputs depend only on their input text, and users re-submit the same resume
+# and job posts often, so results can be kept on disk across restarts. The values include
+# resume contents (PII) stored unencrypted, so the cache is opt-in: set a path to enable it.
+LLM_DISK_CACHE_PATH = os.environ.get("LLM_DISK_CACHE_PATH", "")
+LLM_DISK_CACHE_TTL_SECONDS = float(os.environ.get("LLM_DISK_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+
+def _open_disk_cache() -> Optional[DiskCache]:
+    if not LLM_DISK_CACHE_PATH:
+        return None
+    try:
+        return DiskCache(LLM_DISK_CACHE_PATH, ttl=LLM_DISK_CACHE_TTL_SECONDS)
+    except (OSError, sqlite3.Error):
+        log.warning("LLM disk cache unavailable; continuing without it", exc_info=True, extra={"path": LLM_DISK_CACHE_PATH})
+        return None
+
+_disk_cache = _open_disk_cache()
+
+def _cache_namespace(name: str, system_prompt: str) -> str:
+    # Editing an agent's prompt changes its namespace, so stale outputs are never served
+    return f"{name}:{hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()[:16]}"
+
+# Resume/job matching results are reused for an hour. Their cache key ignores case and
+# whitespace layout, so a re-pasted resume or job post that differs only in formatting
+# gets the earlier analysis.
+MATCH_CACHE_TTL_SECONDS = 3600
+
+def _match_cache_text(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+# --- Clients ---
+
+@functools.lru_cache(maxsize=8)
+def _get_client(base_url: str, api_key: str) -> OpenAI:
+    """Return one shared OpenAI-compatible client per provider endpoint and key.
+
+    Reusing the client keeps its connection pool, so consecutive calls skip the
+    TCP/TLS handshake. The client is thread-safe and shared by the LLM pool. HTTP/2 lets
+    concurrent calls to the same provider multiplex over one connection.
+    """
+    http_client = httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60),
+        # A stalled provider fails over instead of holding the call for minutes
+        timeout=httpx.Timeout(connect=3.0, read=180.0, write=10.0, pool=5.0),
+    )
+    return OpenAI(base_url=base_url, api_key=api_key, http_client=http_client)
+
+@functools.lru_cache(maxsize=64)
+def _system_message(system_prompt: str) -> dict:
+    """Shared system message dict per prompt; the prompts are module constants, so
+    every call for an agent reuses the same object instead of building a new one.
+    Callers must not mutate it."""
+    return {"role": "system", "content": system_prompt}
+
 # --- Core LLM Caller Function ---
 
-def call_llm_provider(provider_name, workload_difficulty, system_prompt, user_prompt, custom_settings=None, clean_to_ascii: bool = True):
+class _ProviderBreaker:
+    """Per-provider circuit breaker: after `threshold` consecutive failures a provider
+    is skipped for `cooldown` seconds so calls go straight to the next one."""
+
+    def __init__(self, threshold: int = 3, cooldown: float = 30.0) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures: dict = {}
+        self._open_until: dict = {}
+        self._lock = threading.Lock()
+
+    def is_open(self, provider: str) -> bool:
+        with self._lock:
+            return self._open_until.get(provider, 0.0) > time.monotonic()
+
+    def record_success(self, provider: str) -> None:
+        with self._lock:
+            self._failures.pop(provider, None)
+            self._open_until.pop(provider, None)
+
+    def record_failure(self, provider: str) -> None:
+        with self._lock:
+            failures = self._failures.get(provider, 0) + 1
+            self._failures[provider] = failures
+            if failures >= self.threshold:
+                self._open_until[provider] = time.monotonic() + self.cooldown
+                self._failures[provider] = 0
+
+
+_breaker = _ProviderBreaker()
+
+
+class _RateLimiter:
+    """Thread-safe sliding-window limiter: at most `max_calls` acquisitions per `period` seconds.
+    acquire() blocks until a slot is free."""
+
+    def __init__(self, max_calls: int, period: float = 60.0) -> None:
+        self.max_calls = max_calls
+        self.period = period
+        self._calls: collections.deque = collections.deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and self._calls[0] <= now - self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self._calls[0] + self.period - now
+            time.sleep(wait)
+
+
+# Requests per minute we allow ourselves per provider, kept under each account's limit so
+# bursts from concurrent agent calls queue briefly here instead of drawing 429s.
+PROVIDER_REQUESTS_PER_MINUTE = {
+    "groq": 500,
+    "cerebras": 300,
+    "sambanova": 60,
+    "gemini": 60,
+    "openai": 500,
+}
+# In-flight requests allowed per provider
+LLM_PROVIDER_MAX_CONCURRENCY = int(os.environ.get("LLM_PROVIDER_MAX_CONCURRENCY", "20"))
+_LIMITERS = {p: _RateLimiter(rpm) for p, rpm in PROVIDER_REQUESTS_PER_MINUTE.items()}
+_SEMAPHORES = {p: threading.BoundedSemaphore(LLM_PROVIDER_MAX_CONCURRENCY) for p in provider_urls}
+
+
+@contextlib.contextmanager
+def _provider_slot(provider: str):
+    """Hold one of the provider's concurrency slots and a rate-limit token for a request."""
+    with _SEMAPHORES[provider]:
+        _LIMITERS[provider].acquire()
+        yield
+
+# Errors worth trying on another provider: timeouts, dropped connections, rate limits and 5xx.
+# (The SDK has already retried these on the same provider before raising.)
+_FAILOVER_ERRORS = (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)
+FAILOVER_BACKOFF_BASE = 0.25
+FAILOVER_BACKOFF_MAX = 4.0
+# Seconds to wait for a provider before firing the next one in parallel; 0 disables hedging.
+LLM_HEDGE_AFTER_SECONDS = float(os.environ.get("LLM_HEDGE_AFTER_SECONDS", "0"))
+# Most providers racing one call at a time; caps the duplicated spend of hedging.
+LLM_HEDGE_MAX_IN_FLIGHT = 2
+# The job-history rewrite hedges only once its primary model is slower than its usual
+# tail: EWMA mean plus this many EWMA absolute deviations (roughly p99).
+REWRITE_HEDGE_TAIL_DEVIATIONS = 3.0
+# Latency samples needed before the tail estimate is trusted; hedging stays off until then.
+REWRITE_HEDGE_MIN_SAMPLES = 10
+_hedge_pool = concurrent.futures.ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY * LLM_HEDGE_MAX_IN_FLIGHT, thread_name_prefix="llm-hedge")
+
+
+class _LatencyStats:
+    """Exponentially weighted latency, latency deviation and error rate per (provider, model).
+
+    Latency and deviation come from successful calls only; the error rate from every
+    call. score() is the mean latency inflated by the error rate, so a model that keeps
+    failing ranks as slow even when its failures return quickly. tail() estimates a high
+    latency percentile.
+    """
+
+    def __init__(self, alpha: float = 0.2, error_penalty: float = 4.0) -> None:
+        self.alpha = alpha
+        self.error_penalty = error_penalty
+        self._stats: dict = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, model: str, seconds: float, ok: bool) -> None:
+        key = (provider, model)
+        error = 0.0 if ok else 1.0
+        with self._lock:
+            current = self._stats.get(key)
+            if current is None:
+                self._stats[key] = (seconds if ok else None, 0.0, error, 1 if ok else 0)
+                return
+            latency, deviation, error_rate, samples = current
+            error_rate += self.alpha * (error - error_rate)
+            if ok:
+                if latency is None:
+                    # First successful sample seeds the latency estimate
+                    latency = seconds
+                else:
+                    deviation += self.alpha * (abs(seconds - latency) - deviation)
+                    latency += self.alpha * (seconds - latency)
+                samples += 1
+            self._stats[key] = (latency, deviation, error_rate, samples)
+
+    def score(self, provider: str, model: str) -> Optional[float]:
+        with self._lock:
+            current = self._stats.get((provider, model))
+        if current is None or current[0] is None:
+            return None
+        latency, _, error_rate, _ = current
+        return latency * (1.0 + self.error_penalty * error_rate)
+
+    def tail(self, provider: str, model: str, deviations: float, min_samples: int) -> Optional[float]:
+        """Mean latency plus `deviations` mean absolute deviations, or None until
+        `min_samples` successful calls have been recorded."""
+        with self._lock:
+            current = self._stats.get((provider, model))
+        if current is None or current[3] < min_samples:
+            return None
+        latency, deviation, _, _ = current
+        return latency + deviations * deviation
+
+
+_latency_stats = _LatencyStats()
+# A model is tried after the others once its score exceeds this multiple of the best one.
+LLM_ROUTING_SLOWDOWN_FACTOR = float(os.environ.get("LLM_ROUTING_SLOWDOWN_FACTOR", "3"))
+
+
+def _tail_hedge_delay(provider_name: str, workload_difficulty: str) -> float:
+    """Hedge delay for a workload: the preferred model's tail latency, or 0 (no hedging)
+    while too few calls have been observed to estimate it."""
+    model = _MODEL_INDEX.get((workload_difficulty, provider_name.lower()))
+    if model is None:
+        return 0.0
+    tail = _latency_stats.tail(
+        model["provider"].lower(), model["model"], REWRITE_HEDGE_TAIL_DEVIATIONS, REWRITE_HEDGE_MIN_SAMPLES,
+    )
+    return tail or 0.0
+
+
+def _failover_backoff(failures: int) -> None:
+    # Full jitter keeps concurrent callers from failing over in lockstep
+    time.sleep(random.uniform(0, min(FAILOVER_BACKOFF_MAX, FAILOVER_BACKOFF_BASE * 2 ** failures)))
+
+
+def _first_success(calls: List[Callable[[], T]], hedge_after: float) -> T:
+    """Run `calls` in order until one succeeds and return its result.
+
+    A call failing with a failover error moves on to the next one after a jittered
+    backoff; any other error is raised. With `hedge_after` > 0 the next call is also
+    started whenever the running ones have not answered within that many seconds (up to
+    LLM_HEDGE_MAX_IN_FLIGHT at once), and the first successful answer wins. An error that
+    is not worth failing over on stops further calls from starting but is only raised
+    once every running call has failed too. Losing calls are left to finish in the background.
+    """
+    if hedge_after <= 0:
+        last_error: Optional[BaseException] = None
+        for failures, call in enumerate(calls):
+            if failures:
+                _failover_backoff(failures)
+            try:
+                return call()
+            except _FAILOVER_ERRORS as e:
+                last_error = e
+        assert last_error is not None
+        raise last_error
+
+    remaining = iter(calls)
+    pending: set = set()
+    failures = 0
+    last_error = None
+    fatal_error: Optional[BaseException] = None
+
+    def _launch() -> None:
+        call = next(remaining, None)
+        if call is not None:
+            pending.add(_hedge_pool.submit(call))
+
+    _launch()
+    while pending:
+        done, _ = concurrent.futures.wait(pending, timeout=hedge_after, return_when=concurrent.futures.FIRST_COMPLETED)
+        if not done:
+            if fatal_error is None and len(pending) < LLM_HEDGE_MAX_IN_FLIGHT:
+                _launch()
+            continue
+        for future in done:
+            pending.discard(future)
+            error = future.exception()
+            if error is None:
+                for other in pending:
+                    other.cancel()
+                return future.result()
+            if not isinstance(error, _FAILOVER_ERRORS):
+                # Not worth another provider, but a call still running may yet succeed
+                fatal_error = error
+                continue
+            last_error = error
+            failures += 1
+        if not pending:
+            if fatal_error is not None:
+                raise fatal_error
+            _failover_backoff(failures)
+            _launch()
+    assert last_error is not None
+    raise last_error
+
+
+def _candidate_models(provider_name: str, workload_difficulty: str) -> List[dict]:
+    """Models to try for a workload: the requested provider's first, then the rest of
+    model_mapping in order. Models that have recently been much slower or less reliable
+    than the others move behind them, and providers whose circuit breaker is open go last."""
+    available_models = model_mapping[workload_difficulty]
+    preferred = _MODEL_INDEX.get((workload_difficulty, provider_name.lower()))
+    if preferred is None:
+        log.warning("No model found for provider '%s'. Using first available: %s", provider_name, available_models[0])
+        ordered = list(available_models)
+    else:
+        ordered = [preferred] + [m for m in available_models if m is not preferred]
+    healthy = [m for m in ordered if not _breaker.is_open(m["provider"].lower())]
+    # Within the healthy ones, keep the configured order unless a model has recently been
+    # far slower or more error-prone than the best of the others
+    scores = {id(m): _latency_stats.score(m["provider"].lower(), m["model"]) for m in healthy}
+    known = [score for score in scores.values() if score is not None]
+    if len(known) > 1:
+        cutoff = min(known) * LLM_ROUTING_SLOWDOWN_FACTOR
+        degraded = [m for m in healthy if (scores[id(m)] or 0.0) > cutoff]
+        healthy = [m for m in healthy if m not in degraded] + degraded
+    return healthy + [m for m in ordered if m not in healthy]
+
+
+def call_llm_provider(provider_name, workload_difficulty, system_prompt, user_prompt, custom_settings=None, clean_to_ascii: bool = True, hedge_after: Optional[float] = None):
     begin_time = datetime.datetime.now()
-    log = bind_logger(logger, {"agent_name": "call llm provider"})
+    log = _provider_log
 
     log.info("Calling LLM provider", extra={"provider": provider_name, "workload": workload_difficulty})
     """
     Calls an OpenAI-compatible LLM provider and returns the results based on workload difficulty.
 
+    The requested provider's model is tried first; on timeouts, connection errors, rate
+    limits or 5xx responses the call fails over to the workload's other models in
+    model_mapping order.
+
     Args:
-        provider_name (str): The name of the LLM provider ('groq' or 'cerebras').
+        provider_name (str): The name of the preferred LLM provider ('groq' or 'cerebras').
         workload_difficulty (str): The difficulty of the workload, used to select an LLM model.
         system_prompt (str): The system prompt for the LLM.
         user_prompt (str): The user prompt for the LLM.
         custom_settings (dict, optional): Custom settings for the API call. Defaults to None.
+        hedge_after (float, optional): Seconds to wait before also firing the next provider
+            in parallel. Defaults to LLM_HEDGE_AFTER_SECONDS (0 = no hedging).
 
     Returns:
         str: The response from the LLM.
     """
 
     if provider_name.lower() not in provider_urls:
-        log.error(f"Unknown provider: {provider_name}")
+        log.error("Unknown provider: %s", provider_name)
         raise ValueError(f"Error: Unknown provider '{provider_name}'.")
 
     # Add check for workload difficulty existence
     if workload_difficulty not in model_mapping:
-        log.error(f"Unsupported workload difficulty: {workload_difficulty}")
+        log.error("Unsupported workload difficulty: %s", workload_difficulty)
         raise ValueError(f"Error: Unsupported workload difficulty '{workload_difficulty}'.")
 
-    # Retrieve the list of provider-model pairs for the given workload_difficulty
-    available_models = model_mapping.get(workload_difficulty)
     # Sanity check for static type-checkers: ensure we actually got a list
-    if not available_models:
-        log.error(f"No models configured for workload_difficulty: {workload_difficulty}")
+    if not model_mapping.get(workload_difficulty):
+        log.error("No models configured for workload_difficulty: %s", workload_difficulty)
         raise ValueError(f"No models available for workload_difficulty '{workload_difficulty}'")
-    
-    selected_model = None
-    # Prioritize the provider that matches the provider_name argument
-    selected_model = next((m for m in available_models if m["provider"].lower() == provider_name.lower()), None)
 
-    if selected_model is None:
-        selected_model = available_models[0]
-        log.warning(f"No model found for provider '{provider_name}'. Using first available: {selected_model}")
+    candidates = []
+    for model in _candidate_models(provider_name, workload_difficulty):
+        provider = model["provider"].lower()
+        if not os.environ.get(f"{provider.upper()}_API_KEY"):
+            log.warning("API key for %s not found; skipping %s", provider.upper(), model["model"])
+            continue
+        candidates.append(model)
+    if not candidates:
+        log.error("No API key found for any provider of workload %s.", workload_difficulty)
+        raise ValueError(f"Error: No API key found for any provider of workload '{workload_difficulty}'.")
+
+    call_one = functools.partial(
+        _call_one,
+        workload_difficulty=workload_difficulty,
+        system_prompt=system_prompt,
+        user_prompt=user_prompt,
+        custom_settings=custom_settings,
+        clean_to_ascii=clean_to_ascii,
+    )
+
+    result_text = _first_success(
+        [functools.partial(call_one, model) for model in candidates],
+        LLM_HEDGE_AFTER_SECONDS if hedge_after is None else hedge_after,
+    )
+    seconds = (datetime.datetime.now() - begin_time).total_seconds()
+    log.info("LLM call duration %s", seconds)
+    return result_text
+
+
+def _call_one(selected_model: dict, *, workload_difficulty, system_prompt, user_prompt, custom_settings, clean_to_ascii: bool):
+    """Make the chat completion call against one provider/model pair from model_mapping."""
+    log = _provider_log
 
-    # If no matching provider is found, select the first available provider and model
     selected_model_name = selected_model["model"]
     selected_provider_name_for_url = selected_model["provider"]
-    log.info(f"Selected model: {selected_model_name} from provider: {selected_provider_name_for_url}")
+    log.info("Selected model: %s from provider: %s", selected_model_name, selected_provider_name_for_url)
 
     base_url = provider_urls[selected_provider_name_for_url.lower()]
     api_key = os.environ.get(f"{selected_provider_name_for_url.upper()}_API_KEY")
-    if not api_key:
-        log.error(f"API key for {selected_provider_name_for_url.upper()} not found in environment variables.")
-        raise ValueError(f"Error: API key for {selected_provider_name_for_url.upper()} not found.")
-
-    client = OpenAI(base_url=base_url, api_key=api_key)
+    client = _get_client(base_url, api_key)
 
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt},
-    ]
+    messages = [_system_message(system_prompt), {"role": "user", "content": user_prompt}]
 
     # Merge custom_settings with default parameters
     params = {
@@ -170,16 +567,34 @@ def call_llm_provider(provider_name, workload_difficulty, system_prompt, user_pr
         "messages": messages,
         "stream": False,
         "temperature": 1,
-        "max_tokens": 60000,
+        "max_tokens": DEFAULT_MAX_TOKENS.get(workload_difficulty, FALLBACK_MAX_TOKENS),
     }
+    if GROQ_SERVICE_TIER and selected_provider_name_for_url.lower() == "groq":
+        params["extra_body"] = {"service_tier": GROQ_SERVICE_TIER}
     if custom_settings:
         params.update(custom_settings)
 
+    # Deterministic (low-temperature) calls with identical inputs are replayed from cache
+    cache_key = llm_cache.key_for(params)
     try:
-        response = client.chat.completions.create(**params)
-        log.info("API call successful", extra={"model": selected_model_name})
-
-        raw_text = response.choices[0].message.content
+        raw_text = llm_cache.get(cache_key) if cache_key else None
+        if raw_text is not None:
+            log.info("LLM response served from cache", extra={"model": selected_model_name})
+        else:
+            with _provider_slot(selected_provider_name_for_url.lower()):
+                started = time.monotonic()
+                try:
+                    response = client.chat.completions.create(**params)
+                except _FAILOVER_ERRORS:
+                    _latency_stats.record(selected_provider_name_for_url.lower(), selected_model["model"], time.monotonic() - started, ok=False)
+                    raise
+            _latency_stats.record(selected_provider_name_for_url.lower(), selected_model["model"], time.monotonic() - started, ok=True)
+            log.info("API call successful", extra={"model": selected_model_name})
+            _breaker.record_success(selected_provider_name_for_url.lower())
+
+            raw_text = response.choices[0].message.content
+            if cache_key and raw_text:
+                llm_cache.set(cache_key, raw_text)
         # Optionally sanitize to ASCII and log any replacements
         if clean_to_ascii:
             found, cleaned_text, replacements = normalize_to_ascii(raw_text)
@@ -191,10 +606,11 @@ def call_llm_provider(provider_name, workload_difficulty, system_prompt, user_pr
             result_text = cleaned_text
         else:
             result_text = raw_text
-        end_time =  datetime.datetime.now()
-        seconds = (end_time - begin_time).total_seconds()
-        log.info(f'LLM call duration {seconds}')
         return result_text
+    except _FAILOVER_ERRORS:
+        _breaker.record_failure(selected_provider_name_for_url.lower())
+        log.exception("Transient API error during LLM call in call_llm; failing over", exc_info=True, extra={"model": selected_model_name})
+        raise
     except APIError as e:
         log.exception("An API error occurred during LLM call in call_llm", exc_info=True, extra={"model": selected_model_name})
         raise
@@ -204,6 +620,34 @@ def call_llm_provider(provider_name, workload_difficulty, system_prompt, user_pr
 
 # --- Real LLM Functions  ---
 
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*\n|\n?\s*```\s*$")
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+
+def _loads_lenient(text: str):
+    """Parse JSON emitted by a model, tolerating code fences and trailing commas.
+
+    Raises ValueError when the text is still not valid JSON after repair.
+    """
+    text = _FENCE_RE.sub("", text)
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        # Trailing-comma removal is applied blindly; fine for the short field values
+        # extracted here, where ",]" / ",}" inside a string is vanishingly rare.
+        return orjson.loads(_TRAILING_COMMA_RE.sub(r"\1", text))
+
+@functools.cache
+def _json_schema_format(schema_model: Type[BaseModel]) -> dict:
+    """Strict json_schema response_format for a Pydantic model, built once per model."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": schema_model.__name__,
+            "schema": schema_model.model_json_schema(),
+            "strict": True,
+        },
+    }
+
 def call_llm_with_structured_output(
     *,
     system_prompt: str,
@@ -216,11 +660,12 @@ def call_llm_with_structured_output(
     of (parsed_result, refused). When refused is True, parsed_result will be None.
 
     Notes:
-    - We use native Pydantic support to keep schema and code in sync.
+    - We use native Pydantic support to keep schema and code in sync; the strict JSON
+      schema sent to the provider is built once per model (see _json_schema_format).
     - Objects forbid additional properties via the Pydantic model config.
-    - Some providers may not support structured parsing endpoints; we log and re-raise.
+    - Some providers may not support structured outputs; we log and re-raise.
     """
-    slog = bind_logger(logger, {"agent_name": "call_llm_with_structured_output"})
+    slog = _structured_log
 
     base_url = provider_urls["groq"]
     api_key = os.environ.get("GROQ_API_KEY")
@@ -228,19 +673,16 @@ def call_llm_with_structured_output(
         slog.error("GROQ_API_KEY not found in environment variables")
         raise ValueError("GROQ_API_KEY not found in environment variables")
 
-    client = OpenAI(base_url=base_url, api_key=api_key)
+    client = _get_client(base_url, api_key)
 
-    # Prefer chat.completions.parse for provider compatibility
     try:
-        completion = client.chat.completions.parse(
-            model="openai/gpt-oss-20b",  # Align with existing mapping
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            response_format=schema_model,
-            temperature=0.0,
-        )
+        with _provider_slot("groq"):
+            completion = client.chat.completions.create(
+                model="openai/gpt-oss-20b",  # Align with existing mapping
+                messages=[_system_message(system_prompt), {"role": "user", "content": user_prompt}],
+                response_format=_json_schema_format(schema_model),
+                temperature=0.0,
+            )
         msg = completion.choices[0].message
         # Continue when refusal is not present; only treat as refusal when the
         # attribute exists and is truthy.
@@ -252,10 +694,16 @@ def call_llm_with_structured_output(
                 extra={"refusal": str(refusal_text)[:200]},
             )
             return None, True
-        parsed = getattr(msg, "parsed", None)
-        if parsed is None:
-            slog.error("Structured parse returned no parsed payload")
+        if not msg.content:
+            slog.error("Structured output call returned no content")
             raise ValueError("No parsed payload returned from structured output call")
+        try:
+            parsed = schema_model.model_validate_json(msg.content)
+        except ValidationError:
+            # Near-miss JSON (code fences, trailing commas) is repaired locally rather than
+            # failing the call and forcing the caller into another full LLM round-trip
+            parsed = schema_model.model_validate(_loads_lenient(msg.content))
+            slog.warning("Structured output repaired after strict parse failed")
         slog.info("Structured output parse successful")
         return parsed, False
     except APIError:
@@ -266,6 +714,47 @@ def call_llm_with_structured_output(
         slog.exception("Unexpected error during structured output call", exc_info=True)
         raise
 
+# Input budget for a resume embedded in a matching prompt. Tokens are estimated at
+# ~4 characters each (no tokenizer dependency); the match models have 128k-token
+# windows, so this only bites on pathological inputs such as pasted-in PDFs.
+RESUME_PROMPT_TOKEN_BUDGET = 24000
+CHARS_PER_TOKEN_ESTIMATE = 4
+_BLANK_RUN_RE = re.compile(r"\n{3,}")
+_SPACE_RUN_RE = re.compile(r"[ \t]{2,}")
+
+def _fit_resume_to_budget(resume: str) -> str:
+    """Shrink an oversized resume to RESUME_PROMPT_TOKEN_BUDGET before it is sent.
+
+    Whitespace runs are compressed first; if that is not enough the tail is cut, which
+    drops the oldest roles and trailing sections while keeping the most recent ones.
+    """
+    max_chars = RESUME_PROMPT_TOKEN_BUDGET * CHARS_PER_TOKEN_ESTIMATE
+    if len(resume) <= max_chars:
+        return resume
+    resume = _SPACE_RUN_RE.sub(" ", _BLANK_RUN_RE.sub("\n\n", resume))
+    if len(resume) > max_chars:
+        log.warning("Resume exceeds prompt budget; truncating", extra={"chars": len(resume), "max_chars": max_chars})
+        resume = resume[:max_chars]
+    return resume
+
+def _stable_text(text: str) -> str:
+    """Canonical form of a block that recurs across calls (e.g. a user's resume).
+
+    Providers reuse their prompt-prefix cache only for byte-identical prefixes, so the
+    resume placed first in the user prompt is normalized (line endings, trailing
+    whitespace) to keep that prefix stable between calls with different job posts.
+    """
+    if not text:
+        return ""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+def _current_date_block() -> str:
+    # Kept out of the system prompts so those stay identical across calls (provider prefix cache)
+    now = datetime.datetime.now()
+    return f"<CurrentDate>\nThe current year is {now.year} and the current month is {now.strftime('%B')}.\n</CurrentDate>"
+
+@persist_cache(_disk_cache, _cache_namespace("analyze_job_description", system_prompts.job_summarizer_agent_system_prompt))
 def analyze_job_description(job_description: str) -> str:
     log = bind_logger(logger, {"agent_name": "analyze_job_description"})
 
@@ -278,36 +767,36 @@ def analyze_job_description(job_description: str) -> str:
         user_prompt=prompt
     )
 
+# Sections are separated by blank lines; the <Background> block is only sent when there is one
+_REWRITE_PROMPT = "<JobDescription>\n\n{jd}\n\n</JobDescription>\n\n<CurrentResume>\n\n{resume}\n\n</CurrentResume>"
+_REWRITE_PROMPT_WITH_BACKGROUND = (
+    "<JobDescription>\n\n{jd}\n\n</JobDescription>\n\n"
+    "<Background>\n\n{background}\n\n</Background>\n\n"
+    "<CurrentResume>\n\n{resume}\n\n</CurrentResume>"
+)
+
 def rewrite_job_history(job_history_background: str, summarized_job_description: str, current_resume: str) -> str:
     log = bind_logger(logger, {"agent_name": "rewrite_job_history"})
 
     log.info("LLM Service: Rewriting job history")
     # Add the background to the system prompt as per the notebook's logic
     custom_settings = {"reasoning_effort": "medium"}
-    prompt_parts = [
-        "<JobDescription>",
-        summarized_job_description,
-        "</JobDescription>"
-    ]
     if job_history_background and job_history_background.strip():
-        prompt_parts.extend([
-            "<Background>",
-            job_history_background,
-            "</Background>"
-        ])
-    prompt_parts.extend([
-        "<CurrentResume>",
-        current_resume,
-        "</CurrentResume>"
-    ])
-    prompt = "\n\n".join(prompt_parts)
+        prompt = _REWRITE_PROMPT_WITH_BACKGROUND.format(
+            jd=summarized_job_description, background=job_history_background, resume=current_resume,
+        )
+    else:
+        prompt = _REWRITE_PROMPT.format(jd=summarized_job_description, resume=current_resume)
+    # Providers' latency tails are uncorrelated, so a rewrite stuck past the primary
+    # model's usual tail also starts the next provider and keeps whichever answers first.
     return call_llm_provider(
         provider_name='groq',
         workload_difficulty='resume-rewrite-agent',
         system_prompt=system_prompts.resume_rewriter_agent_system_prompt,
         user_prompt=prompt,
         clean_to_ascii=True,
-        custom_settings = custom_settings
+        custom_settings = custom_settings,
+        hedge_after=_tail_hedge_delay('groq', 'resume-rewrite-agent'),
     )
 
 def generate_professional_summary(updated_resume: str, summarized_job_description: str) -> str:
@@ -315,7 +804,7 @@ def generate_professional_summary(updated_resume: str, summarized_job_descriptio
 
     log.info("LLM Service: Generating new professional summary")
     custom_settings = {"reasoning_effort": "medium"}
-    user_prompt = f"<JobDescription>\n{summarized_job_description}\n</JobDescription>\n\n<Resume>\n{updated_resume}\n</Resume>"
+    user_prompt = f"<JobDescription>\n{summarized_job_description}\n</JobDescription>\n\n<Resume>\n{updated_resume}\n</Resume>\n\n{_current_date_block()}"
     return call_llm_provider(
         provider_name='groq',
         workload_difficulty='professional_summary_rewrite_agent',
@@ -340,6 +829,7 @@ def generate_skills_section(updated_resume: str, summarized_job_description: str
         custom_settings=custom_settings
     )
 
+@persist_cache(_disk_cache, _cache_namespace("score_resume", system_prompts.resume_score_agent_system_prompt), ttl=MATCH_CACHE_TTL_SECONDS, normalize=_match_cache_text)
 def score_resume(resume: str, qualifications: str) -> str:
     """
     Analyze a resume against a list of qualifications and return a csv textual comparison.
@@ -362,7 +852,7 @@ def score_resume(resume: str, qualifications: str) -> str:
         # Build the user prompt. The agent is expected to return a comprehensive analysis,
         # including strengths, gaps, suggested improvements, keyword matches, and sample bullets.
         user_prompt = (
-            f"<Resume>\n{resume}\n</Resume>\n\n"
+            f"<Resume>\n{_fit_resume_to_budget(_stable_text(resume))}\n</Resume>\n\n"
             f"<Qualifications>\n{qualifications}\n</Qualifications>"
         )
 
@@ -384,6 +874,8 @@ def score_resume(resume: str, qualifications: str) -> str:
         # Re-raise so callers can handle the failure; caller may want to mark status elsewhere.
         raise
 
+# The prompt ends with _current_date_block(), so an analysis is only reused within the same month
+@persist_cache(_disk_cache, _cache_namespace("check_resume", system_prompts.resume_match_analyzer_agent_system_prompt), ttl=MATCH_CACHE_TTL_SECONDS, normalize=_match_cache_text, vary=_current_date_block)
 def check_resume(resume: str, job_post: str) -> str:
     """
     Analyze a resume against a job description and return a detailed textual comparison.
@@ -406,8 +898,9 @@ def check_resume(resume: str, job_post: str) -> str:
         # Build the user prompt. The agent is expected to return a comprehensive analysis,
         # including strengths, gaps, suggested improvements, keyword matches, and sample bullets.
         user_prompt = (
-            f"<Resume>\n{resume}\n</Resume>\n\n"
-            f"<Jobpost>\n{job_post}\n</Jobpost>"
+            f"<Resume>\n{_fit_resume_to_budget(_stable_text(resume))}\n</Resume>\n\n"
+            f"<Jobpost>\n{job_post}\n</Jobpost>\n\n"
+            f"{_current_date_block()}"
         )
 
         # Call the generic provider wrapper
@@ -428,6 +921,11 @@ def check_resume(resume: str, job_post: str) -> str:
         # Re-raise so callers can handle the failure; caller may want to mark status elsewhere.
         raise
 
+def _history_items_to_dicts(items: List[ResumeHistoryItem]) -> List[dict]:
+    # ResumeHistoryItem's fields are exactly the returned keys, so pydantic-core dumps them
+    return [item.model_dump() for item in items]
+
+@persist_cache(_disk_cache, _cache_namespace("parse_resume_to_json", system_prompts.resume_history_company_extractor_agent_system_prompt))
 def parse_resume_to_json(resume_text: str) -> List[dict]:
     log = bind_logger(logger, {"agent_name": "parse_resume_to_json"})
 
@@ -436,6 +934,9 @@ def parse_resume_to_json(resume_text: str) -> List[dict]:
 
     last_refusal: Optional[str] = None
     for attempt in range(1, 4):
+        if attempt > 1:
+            # Back off (with jitter) before asking again after a refusal
+            time.sleep(random.uniform(0.5, 1.0) * 2 ** (attempt - 2))
         try:
             parsed, refused = call_llm_with_structured_output(
                 system_prompt=system_prompt,
@@ -450,16 +951,7 @@ def parse_resume_to_json(resume_text: str) -> List[dict]:
             # Convert the Pydantic model to the original expected return:
             # List[dict] with keys: history_job_title, history_company_name, history_job_achievements
             assert isinstance(parsed, ResumeHistoryExtraction)
-            result: List[dict] = []
-            for item in parsed.jobs:
-                # item is ResumeHistoryItem (validated)
-                result.append(
-                    {
-                        "history_job_title": item.history_job_title,
-                        "history_company_name": item.history_company_name,
-                        "history_job_achievements": item.history_job_achievements,
-                    }
-                )
+            result = _history_items_to_dicts(parsed.jobs)
             log.info("Successfully parsed resume history to JSON", extra={"count": len(result)})
             return result
 
@@ -477,6 +969,7 @@ def parse_resume_to_json(resume_text: str) -> List[dict]:
     log.error("Structured parsing failed after 3 refusals", extra={"reason": refusal_msg})
     raise ValueError("The AI refused to process the resume three times. Please try again or adjust the input.")
 
+@persist_cache(_disk_cache, _cache_namespace("extract_professional_summary", system_prompts.resume_professional_summary_extractor_agent_system_prompt))
 def extract_professional_summary(resume_text: str) -> str:
     log = bind_logger(logger, {"agent_name": "extract_professional_summary"})
 
@@ -493,9 +986,10 @@ def extract_professional_summary(resume_text: str) -> str:
         return response_str
 
     except Exception as e:
-        log.error(f"An error occurred during professional summary extraction: {e}")
+        log.error("An error occurred during professional summary extraction: %s", e)
         raise
 
+@persist_cache(_disk_cache, _cache_namespace("extract_resume_skills", system_prompts.resume_skills_extractor_agent_system_prompt))
 def extract_resume_skills(resume_text: str) -> str:
     log = bind_logger(logger, {"agent_name": "extract_resume_skills"})
 
@@ -512,9 +1006,10 @@ def extract_resume_skills(resume_text: str) -> str:
         return response_str
 
     except Exception as e:
-        log.error(f"An error occurred during skills extraction: {e}")
+        log.error("An error occurred during skills extraction: %s", e)
         raise
 
+@persist_cache(_disk_cache, _cache_namespace("extract_job_qualifications", system_prompts.job_qualifications_extractor_agent_system_prompt))
 def extract_job_qualifications(summarized_job_description: str) -> str:
     """
     Extract a list of qualifications (with integer weights) from a summarized job description.
@@ -534,7 +1029,7 @@ def extract_job_qualifications(summarized_job_description: str) -> str:
         return response_str
     
     except Exception as e:
-        log.error(f"An error occurred during qualifications extraction: {e}")
+        log.error("An error occurred during qualifications extraction: %s", e)
         raise
 
 
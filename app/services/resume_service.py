@@ -3,6 +3,7 @@ import logging
 import json
 import re
 import hashlib
+import functools
 from typing import Optional
 import datetime
 from zoneinfo import ZoneInfo
@@ -32,6 +33,12 @@ if not supabase_url or not supabase_service_key:
 
 supabase: Client = create_client(supabase_url, supabase_service_key)
 
+# Whitespace runs (including non-breaking/zero-width spaces) in a block being located
+_WHITESPACE_RUN_RE = re.compile(r"[\s\u00A0\u200B]+")
+
+def _jd_hash(job_description: str) -> str:
+    return hashlib.sha256((job_description or "").encode("utf-8")).hexdigest()
+
 def run_tailoring_process(application_id: int, user_id: str):
     log = bind_logger(logger, {"agent_name": "tailoring_worker", "user_id": user_id, "application_id": application_id})
     log.info("Starting tailoring process")
@@ -43,23 +50,42 @@ def run_tailoring_process(application_id: int, user_id: str):
         # Match any run of whitespace, including non-breaking/zero-width spaces
         return r"[\s\u00A0\u200B]+"
 
-    def _flexible_pattern_from_block(block: str) -> re.Pattern:
+    def _flexible_pattern_from_block(block: str) -> str:
         # Build a regex pattern from the block where any contiguous whitespace in the block
         # is matched as a flexible whitespace run in the target.
-        parts = []
-        i = 0
-        while i < len(block):
-            ch = block[i]
-            if ch.isspace() or ch in ("\u00A0", "\u200B"):
-                # Consume the entire whitespace run in the block
-                while i < len(block) and (block[i].isspace() or block[i] in ("\u00A0", "\u200B")):
-                    i += 1
-                parts.append(_whitespace_pattern())
-            else:
-                parts.append(re.escape(ch))
-                i += 1
-        pattern = "".join(parts)
-        return re.compile(pattern, flags=re.DOTALL | re.MULTILINE)
+        return _whitespace_pattern().join(re.escape(part) for part in _WHITESPACE_RUN_RE.split(block))
+
+    def _flexible_replace_many(haystack: str, replacements: list[tuple]) -> tuple[str, set]:
+        """
+        Whitespace-tolerant replacement of several blocks in a single left-to-right pass.
+        `replacements` holds (key, needle_block, replacement) tuples; each needle's first
+        match is replaced. Text inserted by one replacement is never searched for the
+        others. Returns (new_text, keys_replaced).
+        """
+        replacements = [r for r in replacements if r[1]]
+        if not replacements:
+            return haystack, set()
+        # Longest blocks first so a block that contains another one wins at the same position
+        ordered = sorted(enumerate(replacements), key=lambda item: len(item[1][1]), reverse=True)
+        pattern = re.compile(
+            "|".join(f"(?P<b{i}>{_flexible_pattern_from_block(block)})" for i, (_key, block, _new) in ordered),
+            flags=re.DOTALL | re.MULTILINE,
+        )
+        pieces = []
+        pos = 0
+        done = set()
+        for m in pattern.finditer(haystack):
+            key, _block, new_text = replacements[int(m.lastgroup[1:])]
+            if key in done:
+                continue
+            pieces.append(haystack[pos:m.start()])
+            pieces.append(new_text)
+            pos = m.end()
+            done.add(key)
+            if len(done) == len(replacements):
+                break
+        pieces.append(haystack[pos:])
+        return "".join(pieces), done
 
     def _flexible_replace(haystack: str, needle_block: str, replacement: str) -> tuple[str, bool]:
         """
@@ -67,26 +93,29 @@ def run_tailoring_process(application_id: int, user_id: str):
         inside haystack. Returns (new_text, replaced_bool) and preserves haystack formatting
         except for the replaced region, which uses `replacement` as-is.
         """
-        if not needle_block:
-            return haystack, False
-        pat = _flexible_pattern_from_block(needle_block)
-        m = pat.search(haystack)
-        if not m:
-            return haystack, False
-        start, end = m.span()
-        return haystack[:start] + replacement + haystack[end:], True
+        new_text, done = _flexible_replace_many(haystack, [(None, needle_block, replacement)])
+        return new_text, bool(done)
     try:
-        # Step 1: Fetch all necessary data from Supabase
+        # Steps 1-2: Fetch the data from Supabase and analyze the job description. The
+        # analysis only needs the application row, so the application read and the LLM
+        # call run alongside the profile and job-history reads.
         log.info("Fetching data from Supabase...")
-        app_data = supabase.table("applications").select("*").eq("id", application_id).single().execute().data
-        profile_data = supabase.table("profiles").select("base_resume_text, base_summary_text, base_skills_text, gdrive_master_resume_id, first_name, last_name").eq("id", user_id).single().execute().data
-        job_histories_to_rewrite = supabase.table("job_histories").select("*").eq("user_id", user_id).eq("is_default_rewrite", True).execute().data
-        
-        # Step 2: Analyze the job description
-        summarized_jd = llm_service.analyze_job_description(app_data['target_job_description'])
-
-        # Step 3: Rewrite the selected job histories
-        rewritten_histories = {}
+        def _fetch_application_and_analyze() -> tuple[dict, str]:
+            app_row = supabase.table("applications").select("target_job_description, summarized_jd, target_jd_hash").eq("id", application_id).single().execute().data
+            # Reuse the summary stored by an earlier run if the posting has not changed since
+            if app_row.get("summarized_jd") and app_row.get("target_jd_hash") == _jd_hash(app_row['target_job_description']):
+                log.info("Reusing stored job description summary")
+                return app_row, app_row["summarized_jd"]
+            return app_row, llm_service.analyze_job_description(app_row['target_job_description'])
+
+        (app_data, summarized_jd), profile_data, job_histories_to_rewrite = llm_service.run_concurrently(
+            _fetch_application_and_analyze,
+            lambda: supabase.table("profiles").select("base_resume_text, base_summary_text, base_skills_text, gdrive_master_resume_id, first_name, last_name").eq("id", user_id).single().execute().data,
+            lambda: supabase.table("job_histories").select("id, job_title, company_name, achievements, detailed_background").eq("user_id", user_id).eq("is_default_rewrite", True).execute().data,
+        )
+
+        # Step 3: Rewrite the selected job histories (independent of each other, so in parallel)
+        rewrite_calls = []
         for history in job_histories_to_rewrite:
             # Ensure there is detailed background to work with
             #if not history.get('detailed_background'):
@@ -96,20 +125,22 @@ def run_tailoring_process(application_id: int, user_id: str):
             log.info("Rewriting job history", extra={"history_id": history['job_title']})
 
             current_resume = history.get('achievements', '') or ""
-            #log.info(f'\n\n\n\n\n\n\n\n\nType:  {type(current_resume)} \n and preview of current resume context:{current_resume[:200]}')
-            rewritten_text = llm_service.rewrite_job_history(
+            rewrite_calls.append(functools.partial(
+                llm_service.rewrite_job_history,
                 job_history_background=history['detailed_background'],
                 summarized_job_description=summarized_jd,
                 current_resume=current_resume  # Using detailed background as current resume context
-            )
-            #log.info("Rewritten text for history id %s: %s", history['id'], rewritten_text)
-            rewritten_histories[history['id']] = rewritten_text
+            ))
+        rewritten_texts = llm_service.run_concurrently(*rewrite_calls)
+        rewritten_histories = {
+            history['id']: rewritten_text
+            for history, rewritten_text in zip(job_histories_to_rewrite, rewritten_texts)
+        }
 
         # Step 4: Assemble the intermediate resume with real find-and-replace
         updated_resume = profile_data['base_resume_text']
-        # Start final resume from updated_resume to ensure defined even if no replacements happen
-        final_resume = updated_resume
         log.info("Replacing job history sections in the resume...")
+        pending_replacements = []
         for history in job_histories_to_rewrite:
             history_id = history['id']
             log.info("Processing replacement for history", extra={"history_id": history_id})
@@ -191,52 +222,74 @@ def run_tailoring_process(application_id: int, user_id: str):
                             "context": norm_resume[ctx_start:ctx_end],
                         },
                     )
-            # Try flexible replacement that tolerates whitespace differences
-            replaced_resume, did_replace = _flexible_replace(updated_resume, original_achievements_block, new_rewritten_text)
-            if not did_replace:
-                log.warning("Flexible replacement failed for job history block; leaving original text", extra={"history_id": history_id})
-                if tailor_debug_verbose:
-                    # Try to find best-effort alignment for debugging: first differing index between
-                    # updated_resume and a naive replacement attempt in a normalized space.
-                    def _first_diff(a: str, b: str) -> int:
-                        for i, (ca, cb) in enumerate(zip(a, b)):
-                            if ca != cb:
-                                return i
-                        return min(len(a), len(b))
-
-                    naive = updated_resume.replace(original_achievements_block, new_rewritten_text)
-                    diff_idx = _first_diff(updated_resume, naive)
-                    ctx_start = max(0, diff_idx - 80)
-                    ctx_end = min(len(updated_resume), diff_idx + 80)
-                    log.debug(
-                        "Naive replace diff context",
-                        extra={
-                            "history_id": history_id,
-                            "diff_index": diff_idx,
-                            "before_context": updated_resume[ctx_start:ctx_end],
-                            "after_context": naive[ctx_start:ctx_end],
-                        },
-                    )
-            else:
-                updated_resume = replaced_resume
+            # Replaced below, together with the other histories, in a single pass
+            pending_replacements.append((history_id, original_achievements_block, new_rewritten_text))
+
+        # Try flexible replacement that tolerates whitespace differences
+        base_resume = updated_resume
+        updated_resume, replaced_ids = _flexible_replace_many(base_resume, pending_replacements)
+        for history_id, original_achievements_block, new_rewritten_text in pending_replacements:
+            if history_id in replaced_ids:
+                continue
+            log.warning("Flexible replacement failed for job history block; leaving original text", extra={"history_id": history_id})
+            if tailor_debug_verbose:
+                # Try to find best-effort alignment for debugging: first differing index between
+                # the resume and a naive replacement attempt in a normalized space.
+                def _first_diff(a: str, b: str) -> int:
+                    for i, (ca, cb) in enumerate(zip(a, b)):
+                        if ca != cb:
+                            return i
+                    return min(len(a), len(b))
+
+                naive = base_resume.replace(original_achievements_block, new_rewritten_text)
+                diff_idx = _first_diff(base_resume, naive)
+                ctx_start = max(0, diff_idx - 80)
+                ctx_end = min(len(base_resume), diff_idx + 80)
+                log.debug(
+                    "Naive replace diff context",
+                    extra={
+                        "history_id": history_id,
+                        "diff_index": diff_idx,
+                        "before_context": base_resume[ctx_start:ctx_end],
+                        "after_context": naive[ctx_start:ctx_end],
+                    },
+                )
+        # Start final resume from updated_resume to ensure defined even if no replacements happen
+        final_resume = updated_resume
 
         # Step 5: Conditionally generate the new summary and skills only if present
         # Read the existing summary/skills from the profile (do NOT coerce to str — that can create 'None')
         old_summary = profile_data.get('base_summary_text')
         old_skills = profile_data.get('base_skills_text')
 
-        new_summary = None
-        new_skills = None
+        def _generate_or_none(label: str, generate, *args) -> Optional[str]:
+            try:
+                generated = generate(*args)
+                log.info("Generated new %s", label)
+                return generated
+            except Exception:
+                log.exception("Failed to generate new %s; skipping replacement", label)
+                return None
 
-        # Generate and attempt to replace the professional summary only if one exists
+        # Summary and skills are generated from the same intermediate resume, so both
+        # requests go out together; each is only generated if the section exists.
+        generate_calls = [lambda: None, lambda: None]
         if old_summary:
             log.info("Found existing summary — generating replacement...")
-            try:
-                new_summary = llm_service.generate_professional_summary(updated_resume, app_data['target_job_description'])
-                log.info("Generated new summary")
-            except Exception:
-                log.exception("Failed to generate new professional summary; skipping replacement")
+            generate_calls[0] = functools.partial(
+                _generate_or_none, "professional summary",
+                llm_service.generate_professional_summary, updated_resume, app_data['target_job_description'],
+            )
+        if old_skills:
+            log.info("Found existing skills — generating replacement...")
+            generate_calls[1] = functools.partial(
+                _generate_or_none, "skills section",
+                llm_service.generate_skills_section, updated_resume, summarized_jd, old_skills,
+            )
+        new_summary, new_skills = llm_service.run_concurrently(*generate_calls)
 
+        # Attempt to replace the professional summary only if one exists
+        if old_summary:
             if new_summary:
                 log.info("Attempting flexible summary replacement")
                 replaced_resume, did_replace = _flexible_replace(updated_resume, old_summary, new_summary)
@@ -249,15 +302,8 @@ def run_tailoring_process(application_id: int, user_id: str):
         else:
             log.info("No existing summary found; skipping summary generation and replacement")
 
-        # Generate and attempt to replace the skills section only if one exists
+        # Attempt to replace the skills section only if one exists
         if old_skills:
-            log.info("Found existing skills — generating replacement...")
-            try:
-                new_skills = llm_service.generate_skills_section(updated_resume, summarized_jd, old_skills)
-                log.info("Generated new skills section")
-            except Exception:
-                log.exception("Failed to generate new skills section; skipping replacement")
-
             if new_skills:
                 log.info("Attempting flexible skills replacement")
                 replaced_resume, did_replace_sk = _flexible_replace(final_resume, old_skills, new_skills)
@@ -292,6 +338,8 @@ def run_tailoring_process(application_id: int, user_id: str):
         update_payload = {
             "final_resume_text": final_resume,
             "updated_fields": updated_fields,
+            "summarized_jd": summarized_jd,
+            "target_jd_hash": _jd_hash(app_data['target_job_description']),
             "status": "completed",
             "updated_at": datetime.datetime.now(ZoneInfo("America/Los_Angeles")).isoformat()
         }
@@ -454,21 +502,28 @@ def run_resume_check_process(user_id: str, job_post: str, resume_text: Optional[
     log.info("Starting resume check process")
     try:
         # Attempt to find the corresponding resume_checks row so we can persist qualifications
-        try:
-            # Keep the query simple and avoid provider-specific order parameters
-            job_rows = supabase.table("resume_checks").select("*").eq("user_id", user_id).eq("job_post", job_post).limit(1).execute().data
-            job_row = (job_rows[0] if job_rows else None)
-            job_id = job_row.get("id") if job_row else None
-        except Exception as e:
-            log.error(f"Failed to retrieve job row: {e}")
-            # Fallback: don't fail the whole job if we can't read the row
-            job_row = None
-            job_id = None
+        def _fetch_job_row() -> Optional[dict]:
+            try:
+                # Keep the query simple and avoid provider-specific order parameters
+                job_rows = supabase.table("resume_checks").select("id, qualifications").eq("user_id", user_id).eq("job_post", job_post).limit(1).execute().data
+                return job_rows[0] if job_rows else None
+            except Exception as e:
+                log.error("Failed to retrieve job row: %s", e)
+                # Fallback: don't fail the whole job if we can't read the row
+                return None
+
+        # Step 1: Ensure we have a resume to analyze. If not provided, fetch the user's generic
+        # resume; that read is independent of the job row lookup, so both run together.
+        def _fetch_profile() -> Optional[dict]:
+            if resume_text:
+                return None
+            log.info("No resume provided — fetching base resume for user from Supabase")
+            return supabase.table("profiles").select("base_resume_text, base_summary_text").eq("id", user_id).single().execute().data
+
+        job_row, profile_data = llm_service.run_concurrently(_fetch_job_row, _fetch_profile)
+        job_id = job_row.get("id") if job_row else None
 
-        # Step 1: Ensure we have a resume to analyze. If not provided, fetch the user's generic resume.
         if not resume_text:
-            log.info("No resume provided — fetching base resume for user from Supabase")
-            profile_data = supabase.table("profiles").select("base_resume_text, base_summary_text").eq("id", user_id).single().execute().data
             if not profile_data or not profile_data.get('base_resume_text'):
                 log.error("No base resume found for user; aborting analysis")
                 raise ValueError("No resume available for analysis")
@@ -513,12 +568,74 @@ def run_resume_check_process(user_id: str, job_post: str, resume_text: Optional[
         resume_to_check: str = resume_text  # type: ignore[assignment]
         assert isinstance(resume_to_check, str)
         # Pass the qualifications text directly to the LLM for scoring (LLMs can parse strings)
-        score = llm_service.score_resume(resume_to_check, qualifications_text or "")
-        analysis = llm_service.check_resume(resume_to_check, job_post or "")
+        # Scoring and the narrative analysis are independent; run them side by side
+        score, analysis = llm_service.run_concurrently(
+            functools.partial(llm_service.score_resume, resume_to_check, qualifications_text or ""),
+            functools.partial(llm_service.check_resume, resume_to_check, job_post or ""),
+        )
 
         log.info("Analysis complete — returning results")
         return (score, analysis)
 
     except Exception as e:
         log.exception("Error during resume check process: %s", e)
-        raise
\ No newline at end of file
+        raise
+
+
+def run_process_resume(user_id: str, resume_text: str) -> dict:
+    """
+    Parse a resume with the LLM extractors and replace the user's stored job histories.
+
+    Args:
+        user_id (str): The id of the user whose profile and job histories are replaced.
+        resume_text (str): The full resume as plain text.
+
+    Returns:
+        dict: {"jobs": [...inserted job_histories rows...], "summary": str, "skills": str}
+
+    Behavior:
+        - Extracts the professional summary, skills section, and job histories via `llm_service`.
+        - Calls the `process_resume_replace` RPC, which DELETES all previous job histories for
+          the user, inserts the parsed ones, and stores summary, skills, and resume text on the
+          profile in a single transaction.
+        - Raises on fatal errors so the caller (worker) can mark the job as failed.
+    """
+    log = bind_logger(logger, {"agent_name": "process_resume", "user_id": user_id})
+    log.info("Starting process resume")
+
+    # The three extractors read the same resume independently; run them concurrently
+    professional_summary, skills_text, parsed_jobs = llm_service.run_concurrently(
+        functools.partial(llm_service.extract_professional_summary, resume_text),
+        functools.partial(llm_service.extract_resume_skills, resume_text),
+        functools.partial(llm_service.parse_resume_to_json, resume_text),
+    )
+    log.info("Extracted professional summary, skills section and job histories")
+
+    # Delete old histories, insert the parsed ones and update the profile in one
+    # transactional round-trip (see supabase/migrations/*_process_resume_replace*.sql).
+    # The RPC returns only the new ids; rows are rebuilt from the data we already hold.
+    inserted_ids = supabase.rpc("process_resume_replace", {
+        "p_user_id": user_id,
+        "p_resume_text": resume_text,
+        "p_summary": professional_summary,
+        "p_skills": skills_text,
+        "p_jobs": parsed_jobs,
+    }).execute().data or []
+
+    inserted_data = [
+        {
+            "id": job_id,
+            "user_id": user_id,
+            "company_name": job.get("history_company_name"),
+            "job_title": job.get("history_job_title"),
+            "achievements": job.get("history_job_achievements") or "",
+        }
+        for job_id, job in zip(inserted_ids, parsed_jobs)
+    ]
+
+    log.info("Inserted parsed job histories", extra={"inserted_count": len(inserted_data)})
+    return {
+        "jobs": inserted_data or [],
+        "summary": professional_summary,
+        "skills": skills_text,
+    }
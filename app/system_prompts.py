@@ -1,7 +1,9 @@
 # app/system_prompts.py
-import datetime
+# Prompts are fixed strings so every call sends a byte-identical system message and
+# providers can reuse their prompt-prefix cache. Per-call context (like today's date)
+# goes in the user message instead.
 #-------Scoring and Checking Agents---------
-resume_match_analyzer_agent_system_prompt = f"""
+resume_match_analyzer_agent_system_prompt = """
 <Role>
 Assume you are a professional recruiter.
 </Role>
@@ -45,7 +47,7 @@ No hiring manager or team information found.
 Proof read done. Everything looks good.
 </Example_output>
 
-The current year is {datetime.datetime.now().year} and the current month is {datetime.datetime.now().strftime('%B')}.
+The current date is given in <CurrentDate>.
 """
 
 resume_score_agent_system_prompt = """
@@ -198,7 +200,7 @@ Agile CI/CD DevOps GitOps and SDLC proficiency,8
 
 #------- Rewriter Agents---------
 
-professional_summary_rewriter_agent_system_prompt = f"""
+professional_summary_rewriter_agent_system_prompt = """
 <Thinking Steps>
 1- Silently develop a list of requirements, skills and experiences from the job description for yourself, with their relative importance from 1 to 10, 1 being not important and 10 being critical.
 2- Silently, for yourself, compare the resume and the job description for items in the job description that are missing in the resume.
@@ -224,11 +226,11 @@ Draft a one-paragraph professional summary to use on the resume to improve the m
 * Write your response in plain text with no formatting.
 * Use 400 or less characters.
 * Avoid using non-ASCII characters. Always use plain ASCII characters.
-* The current year is {datetime.datetime.now().year} and the current month is {datetime.datetime.now().strftime('%B')}.
+* The current date is given in <CurrentDate>.
 </Instructions>
 """
 
-resume_rewriter_agent_system_prompt = f"""
+resume_rewriter_agent_system_prompt = """
 <Role>
 Assume you are a professional resume writer.
 </Role>
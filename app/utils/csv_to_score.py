@@ -50,5 +50,6 @@ def csv_to_score(csv_text: str) -> int:
     return int(round(scaled))
 
 
-test_csv = """qualification,weight,score\nProduct management experience 5+ years including 3+ years B2B,10,10\nTechnical engineering experience 3+ years,10,8\nProduct lifecycle expertise ideation to deployment monitoring,9,9\nData driven decision making leveraging analytics,9,9\nCross functional collaboration with R&D and GTM,8,9\nUser experience design and journey optimization,8,8\nSuccess metrics definition and measurement,8,9\nStrong communication skills across roles,9,9\nCritical thinking problem identification and opportunity spotting,8,8\nExperience with Salesforce HubSpot or cloud marketplaces AWS Azure GCP,7,6\nBachelor's degree in Computer Science Software Engineering or related field,6,8"""
-print(csv_to_score(test_csv))  
\ No newline at end of file
+if __name__ == "__main__":
+    test_csv = """qualification,weight,score\nProduct management experience 5+ years including 3+ years B2B,10,10\nTechnical engineering experience 3+ years,10,8\nProduct lifecycle expertise ideation to deployment monitoring,9,9\nData driven decision making leveraging analytics,9,9\nCross functional collaboration with R&D and GTM,8,9\nUser experience design and journey optimization,8,8\nSuccess metrics definition and measurement,8,9\nStrong communication skills across roles,9,9\nCritical thinking problem identification and opportunity spotting,8,8\nExperience with Salesforce HubSpot or cloud marketplaces AWS Azure GCP,7,6\nBachelor's degree in Computer Science Software Engineering or related field,6,8"""
+    print(csv_to_score(test_csv))
@@ -0,0 +1,139 @@
+import functools
+import hashlib
+import inspect
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Callable, Optional
+
+import orjson
+
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+class DiskCache:
+    """Small persistent key-value cache backed by sqlite, with zlib-compressed JSON values.
+
+    Usage:
+        from app.utils.disk_cache import DiskCache
+        cache = DiskCache("/var/cache/app/llm.sqlite3", ttl=30 * 24 * 3600)
+        cache.set("key", {"any": "json"})
+        value = cache.get("key")
+
+    Unlike TTLCache the entries survive restarts and are shared by every process that
+    opens the same file (API and workers). Values must be JSON-serializable.
+    """
+
+    def __init__(self, path: str, ttl: float = 30 * 24 * 3600, max_entries: int = 100_000) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value BLOB NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        if row is None:
+            return default
+        return orjson.loads(zlib.decompress(row[0]))
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        blob = zlib.compress(orjson.dumps(value))
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO cache (key, expires_at, value) VALUES (?, ?, ?)", (key, expires_at, blob))
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % 1000 == 0
+        if prune:
+            self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        # Drop expired rows, then the soonest-expiring ones beyond max_entries
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM cache")
+
+
+def persist_cache(
+    cache: Optional[DiskCache],
+    namespace: str,
+    ttl: Optional[float] = None,
+    normalize: Optional[Callable[[str], str]] = None,
+    vary: Optional[Callable[[], str]] = None,
+) -> Callable:
+    """Decorator caching a function of string arguments in `cache`, keyed on
+    sha256 of `namespace` plus the arguments. A None cache disables caching.
+
+    Arguments may be passed positionally or by keyword; both map to the same entry.
+    `normalize`, when given, is applied to each argument before hashing so inputs that
+    differ only in ways the function ignores (e.g. whitespace) share one entry. `vary`,
+    when given, is called on every lookup and its result added to the key, for inputs the
+    function reads from elsewhere (e.g. the current date in its prompt). Cache errors are logged and the function is called as if the cache were absent.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if cache is None:
+            return func
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args: str, **kwargs: str) -> Any:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            digest = hashlib.sha256(namespace.encode("utf-8"))
+            if vary is not None:
+                digest.update(b"\0")
+                digest.update(vary().encode("utf-8"))
+            for value in bound.arguments.values():
+                if not isinstance(value, str):
+                    raise TypeError(f"{func.__qualname__} is cached by persist_cache and only takes str arguments")
+                digest.update(b"\0")
+                digest.update((normalize(value) if normalize else value).encode("utf-8"))
+            key = digest.hexdigest()
+            try:
+                cached = cache.get(key)
+            except sqlite3.Error:
+                logger.warning("Disk cache read failed; calling %s uncached", func.__qualname__, exc_info=True)
+                cached = None
+            if cached is not None:
+                return cached
+            result = func(*args, **kwargs)
+            try:
+                cache.set(key, result, ttl=ttl)
+            except sqlite3.Error:
+                logger.warning("Disk cache write failed for %s", func.__qualname__, exc_info=True)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -104,9 +104,8 @@ def replace_text_in_doc(
     if not original_text:
         raise HTTPException(status_code=400, detail="original_text is required")
 
-    creds = gds.get_service_account_credentials()
-    drive = gds.build_drive_service(creds)
-    docs = gds.build_docs_service(creds)
+    drive = gds.build_server_drive_service()
+    docs = gds.build_server_docs_service()
 
     # Delegate to the existing robust updater
     return gds.update_file_content(
@@ -320,9 +319,8 @@ def replace_text_block_flexible(
     if not original_text:
         return {"updated": False, "matches": 0, "method": "replace_text_block_flexible", "reason": "empty original_text"}
 
-    creds = gds.get_service_account_credentials()
-    drive = gds.build_drive_service(creds)
-    docs = gds.build_docs_service(creds)
+    drive = gds.build_server_drive_service()
+    docs = gds.build_server_docs_service()
 
     docs_debug_verbose = bool(str(os.environ.get("DOCS_DEBUG_VERBOSE", "false")).lower() in ("1", "true", "yes"))
 
@@ -401,9 +399,8 @@ def prepend_text_to_doc_top(file_id: str, text: str) -> dict:
     if not text:
         return {"updated": False, "message": "No text to insert"}
 
-    creds = gds.get_service_account_credentials()
-    drive = gds.build_drive_service(creds)
-    docs = gds.build_docs_service(creds)
+    drive = gds.build_server_drive_service()
+    docs = gds.build_server_docs_service()
 
     # Ensure it's a Google Doc
     meta = gds.get_file_metadata(drive, file_id, fields="id, mimeType")
@@ -4,6 +4,93 @@ from collections import Counter
 from typing import Dict, Tuple, Any
 
 
+# Explicit mapping table (char -> replacement) for characters LLMs commonly emit
+_ASCII_MAP = {
+    # Space-like -> regular space or removed
+    "\u00A0": " ",  # No-break space
+    "\u1680": " ",
+    "\u2000": " ",
+    "\u2001": " ",
+    "\u2002": " ",
+    "\u2003": " ",
+    "\u2004": " ",
+    "\u2005": " ",
+    "\u2006": " ",
+    "\u2007": " ",
+    "\u2008": " ",
+    "\u2009": " ",
+    "\u200A": " ",
+    "\u202F": " ",
+    "\u205F": " ",
+    "\u3000": " ",
+    # zero-width / joiners -> remove
+    "\u200B": "",
+    "\u200C": "",
+    "\u200D": "",
+    "\u2060": "",
+    "\uFEFF": "",
+
+    # Quotes -> straight equivalents
+    "\u2018": "'",
+    "\u2019": "'",
+    "\u201A": "'",
+    "\u201B": "'",
+    "\u201C": '"',
+    "\u201D": '"',
+    "\u201E": '"',
+    "\u201F": '"',
+
+    # Dashes/hyphens
+    "\u2011": "-",
+    "\u2012": "-",
+    "\u2013": "-",
+    "\u2014": "-",
+    # Common math and arrow symbols often produced by LLMs
+    "\u00D7": "x",   # multiplication sign ×
+    "\u00F7": "/",   # division sign ÷
+    "\u2192": "->",  # rightwards arrow →
+    "\u2190": "<-",  # leftwards arrow ←
+    "\u2194": "<->", # left-right arrow ↔
+    "\u21D2": "=>",  # rightwards double arrow ⇒
+    "\u21D0": "<=",  # leftwards double arrow ⇐
+    "\u21D4": "<=>", # left-right double arrow ⇔
+
+    "\u2015": "-",
+    "\u2212": "-",
+
+    # Ellipsis
+    "\u2026": "...",
+
+    # Line/paragraph separators -> normalize to \n or remove soft hyphen
+    "\u2028": "\n",
+    "\u2029": "\n",
+    "\u00AD": "",  # soft hyphen: remove
+
+    # Bullets and dots
+    "\u00B7": ".",
+    "\u2022": "-",
+    "\u2023": "-",
+    "\u25AA": "-",
+    "\u25CF": "-",
+    "\u25E6": "-",
+    "\u2024": ".",
+    "\u2027": ".",
+    "\u22C5": ".",
+
+    # Guillemets and primes
+    "\u00AB": '"',
+    "\u00BB": '"',
+    "\u2032": "'",
+    "\u2033": '"',
+    "\u00B0": "deg",
+    "\u2010": "-",
+    "\u2043": "-",
+}
+# Applied in one C-level pass with str.translate instead of a per-match callback
+_ASCII_TABLE = str.maketrans(_ASCII_MAP)
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7F]")
+
+
 def normalize_to_ascii(text: str) -> Tuple[bool, str, Dict[str, Dict[str, Any]]]:
     """Replace known non-ASCII characters with ASCII equivalents.
 
@@ -16,146 +103,31 @@ def normalize_to_ascii(text: str) -> Tuple[bool, str, Dict[str, Dict[str, Any]]]
       the original character was detected but not changed.
     """
 
-    if not text:
+    # Most responses are plain ASCII; str.isascii is a single C-level scan
+    if not text or text.isascii():
         return False, text, {}
 
-    # Build explicit mapping table (char -> replacement)
-    mapping = {
-        # Space-like -> regular space or removed
-        "\u00A0": " ",  # No-break space
-        "\u1680": " ",
-        "\u2000": " ",
-        "\u2001": " ",
-        "\u2002": " ",
-        "\u2003": " ",
-        "\u2004": " ",
-        "\u2005": " ",
-        "\u2006": " ",
-        "\u2007": " ",
-        "\u2008": " ",
-        "\u2009": " ",
-        "\u200A": " ",
-        "\u202F": " ",
-        "\u205F": " ",
-        "\u3000": " ",
-        # zero-width / joiners -> remove
-        "\u200B": "",
-        "\u200C": "",
-        "\u200D": "",
-        "\u2060": "",
-        "\uFEFF": "",
-
-        # Quotes -> straight equivalents
-        "\u2018": "'",
-        "\u2019": "'",
-        "\u201A": "'",
-        "\u201B": "'",
-        "\u201C": '"',
-        "\u201D": '"',
-        "\u201E": '"',
-        "\u201F": '"',
-
-        # Dashes/hyphens
-        "\u2011": "-",
-        "\u2012": "-",
-        "\u2013": "-",
-        "\u2014": "-",
-        # Common math and arrow symbols often produced by LLMs
-        "\u00D7": "x",   # multiplication sign ×
-        "\u00F7": "/",   # division sign ÷
-        "\u2192": "->",  # rightwards arrow →
-        "\u2190": "<-",  # leftwards arrow ←
-        "\u2194": "<->", # left-right arrow ↔
-        "\u21D2": "=>",  # rightwards double arrow ⇒
-        "\u21D0": "<=",  # leftwards double arrow ⇐
-        "\u21D4": "<=>", # left-right double arrow ⇔
-
-        "\u2015": "-",
-        "\u2212": "-",
-
-        # Ellipsis
-        "\u2026": "...",
-
-        # Line/paragraph separators -> normalize to \n or remove soft hyphen
-        "\u2028": "\n",
-        "\u2029": "\n",
-        "\u000a": "\n",
-        "\u00AD": "",  # soft hyphen: remove
-
-        # Bullets and dots
-        "\u00B7": ".",
-        "\u2022": "-",
-        "\u2023": "-",
-        "\u25AA": "-",
-        "\u25CF": "-",
-        "\u25E6": "-",
-        "\u2024": ".",
-        "\u2027": ".",
-        "\u22C5": ".",
-
-        # Guillemets and primes
-        "\u00AB": '"',
-        "\u00BB": '"',
-        "\u2032": "'",
-        "\u2033": '"',
-        "\u00B0": "deg",
-        "\u2010": "-",
-        "\u2043": "-",
-    }
-
-    # Build regex to find any of the mapped characters
-    pattern = re.compile("|".join(re.escape(k) for k in mapping.keys()))
-
-    found_counter = Counter()
-
-    def _replace_match(m: re.Match) -> str:
-        ch = m.group(0)
-        found_counter[ch] += 1
-        return mapping.get(ch, "")
-
-    # First pass: apply explicit mapping
-    text_after = pattern.sub(_replace_match, text)
-
-    # Second pass: find remaining non-ascii characters
-    non_ascii_re = re.compile(r"[^\x00-\x7F]")
-    remaining = non_ascii_re.findall(text_after)
-
-    # We'll collect additional replacements here
-    extra_replacements: Dict[str, Dict[str, Any]] = {}
-
-    if remaining:
-        # Count unique occurrences
-        rem_counts = Counter(remaining)
-        for ch, cnt in rem_counts.items():
-            # Try transliterating using NFKD
-            trans = unicodedata.normalize("NFKD", ch)
-            ascii_equiv = "".join(c for c in trans if ord(c) < 128)
-            if ascii_equiv:
-                replacement = ascii_equiv
-                # Replace all occurrences of ch with replacement if there is an ascii equivalent
-                text_after = text_after.replace(ch, replacement)
-            else:
-                # No ASCII equivalent -> do NOT replace; report as unfixable.
-                replacement = None
-
-            # Report all occurrences of ch with replacement
-            found_counter[ch] += cnt
-            extra_replacements[ch] = {
-                "replacement": replacement,
-                "count": cnt,
-                "codepoint": f"U+{ord(ch):04X}",
-                "unfixable": True if replacement is None else False,
-            }
-
-    # Construct the replacements dict from found_counter and mapping
+    found_counter = Counter(_NON_ASCII_RE.findall(text))
+    text_after = text.translate(_ASCII_TABLE)
+
+    # Characters without an explicit mapping: transliterate via NFKD where possible,
+    # otherwise leave them in place and report them as unfixable.
     replacements: Dict[str, Dict[str, Any]] = {}
+    transliterations: Dict[str, str] = {}
     for ch, cnt in found_counter.items():
+        if ch in _ASCII_MAP:
+            replacement = _ASCII_MAP[ch]
+        else:
+            trans = unicodedata.normalize("NFKD", ch)
+            replacement = "".join(c for c in trans if ord(c) < 128) or None
+            if replacement is not None:
+                transliterations[ch] = replacement
         replacements[ch] = {
-            "replacement": mapping.get(ch, extra_replacements.get(ch, {}).get("replacement", "?")),
+            "replacement": replacement,
             "count": cnt,
             "codepoint": f"U+{ord(ch):04X}",
         }
+    if transliterations:
+        text_after = text_after.translate(str.maketrans(transliterations))
 
-    found_any = len(replacements) > 0
-
-    return found_any, text_after, replacements
+    return True, text_after, replacements
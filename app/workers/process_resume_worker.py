@@ -0,0 +1,58 @@
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from app.services.resume_service import supabase, run_process_resume
+from app.logging_config import get_logger, bind_logger, configure_logging
+from app.utils.env import get_float_from_env
+
+configure_logging()
+logger = get_logger(__name__)
+POLL_INTERVAL = get_float_from_env(
+    ["PROCESS_RESUME_POLL_INTERVAL_SECONDS", "WORKER_POLL_INTERVAL_SECONDS"],
+    default=10.0,
+    min_value=0.0,
+    logger=logger,
+)
+# Resolved once; job timestamps use Pacific time like the other workers
+_LA_TZ = ZoneInfo("America/Los_Angeles")
+logger.info("process_resume_worker starting with poll interval: %ss", POLL_INTERVAL)
+
+
+def process_pending_jobs():
+    """Simple poller that picks up pending process_resume_jobs and parses the resume.
+
+    Mirrors the resume_check worker: the HTTP endpoint only enqueues the job so the
+    long-running LLM extraction never holds a request open.
+    """
+    job_logger = bind_logger(logger, {"agent_name": "process_resume_worker"})
+
+    while True:
+        try:
+            rows = supabase.table("process_resume_jobs").select("*").eq("status", "pending").limit(5).execute().data or []
+            for job in rows:
+                job_id = job["id"]
+                job_logger.info(f'Picking up process_resume job: job_id={job_id}, user_id={job.get("user_id")}')
+                supabase.table("process_resume_jobs").update({"status": "processing", "updated_at": datetime.now(_LA_TZ).isoformat()}).eq("id", job_id).execute()
+                try:
+                    result = run_process_resume(user_id=job["user_id"], resume_text=job["resume_text"])
+                    supabase.table("process_resume_jobs").update({
+                        "status": "completed",
+                        "result": result,
+                        "updated_at": datetime.now(_LA_TZ).isoformat()
+                    }).eq("id", job_id).execute()
+                    job_logger.info("Completed process_resume job")
+                except Exception as e:
+                    job_logger.exception("Job failed", exc_info=True)
+                    supabase.table("process_resume_jobs").update({
+                        "status": "failed",
+                        "error": str(e)[:2000],
+                        "updated_at": datetime.now(_LA_TZ).isoformat()
+                    }).eq("id", job_id).execute()
+            time.sleep(POLL_INTERVAL)
+        except Exception as e:
+            logger.exception("Worker loop error: %s", e)
+            time.sleep(10)
+
+
+if __name__ == "__main__":
+    process_pending_jobs()
@@ -0,0 +1,36 @@
+-- Replace a user's parsed job histories and update their profile in one transaction.
+-- Called by app.services.resume_service.run_process_resume via supabase.rpc(...).
+-- p_jobs is the resume extractor output: [{history_company_name, history_job_title, history_job_achievements}, ...]
+create or replace function public.process_resume_replace(
+    p_user_id uuid,
+    p_resume_text text,
+    p_summary text,
+    p_skills text,
+    p_jobs jsonb
+)
+returns setof public.job_histories
+language plpgsql
+as $$
+begin
+    delete from public.job_histories where user_id = p_user_id;
+
+    update public.profiles
+    set base_resume_text = coalesce(p_resume_text, base_resume_text),
+        base_summary_text = coalesce(p_summary, base_summary_text),
+        base_skills_text = coalesce(p_skills, base_skills_text)
+    where id = p_user_id;
+
+    return query
+    with inserted as (
+        insert into public.job_histories (user_id, company_name, job_title, achievements)
+        select
+            p_user_id,
+            j->>'history_company_name',
+            j->>'history_job_title',
+            coalesce(j->>'history_job_achievements', '')
+        from jsonb_array_elements(coalesce(p_jobs, '[]'::jsonb)) as j
+        returning *
+    )
+    select * from inserted;
+end;
+$$;
@@ -0,0 +1,43 @@
+-- Return only the new job_histories ids from process_resume_replace (return=minimal style).
+-- The caller already holds the inserted values, so echoing whole rows (with their
+-- achievements text) back over the wire is wasted bandwidth and parsing.
+drop function if exists public.process_resume_replace(uuid, text, text, text, jsonb);
+
+create function public.process_resume_replace(
+    p_user_id uuid,
+    p_resume_text text,
+    p_summary text,
+    p_skills text,
+    p_jobs jsonb
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_ids jsonb;
+begin
+    delete from public.job_histories where user_id = p_user_id;
+
+    update public.profiles
+    set base_resume_text = coalesce(p_resume_text, base_resume_text),
+        base_summary_text = coalesce(p_summary, base_summary_text),
+        base_skills_text = coalesce(p_skills, base_skills_text)
+    where id = p_user_id;
+
+    -- Ids are ascending in input order, so the caller can zip them with p_jobs
+    with inserted as (
+        insert into public.job_histories (user_id, company_name, job_title, achievements)
+        select
+            p_user_id,
+            j->>'history_company_name',
+            j->>'history_job_title',
+            coalesce(j->>'history_job_achievements', '')
+        from jsonb_array_elements(coalesce(p_jobs, '[]'::jsonb)) with ordinality as t(j, ord)
+        order by t.ord
+        returning id
+    )
+    select coalesce(jsonb_agg(id order by id), '[]'::jsonb) into v_ids from inserted;
+
+    return v_ids;
+end;
+$$;
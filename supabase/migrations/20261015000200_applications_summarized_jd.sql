@@ -0,0 +1,6 @@
+-- Keep the summarized job description on the application so re-running tailoring for
+-- the same posting (retries, regenerations) skips the summarizer LLM call.
+-- target_jd_hash is sha256(target_job_description) of the text that was summarized.
+alter table public.applications
+    add column if not exists summarized_jd text,
+    add column if not exists target_jd_hash text;
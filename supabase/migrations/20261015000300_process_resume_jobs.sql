@@ -0,0 +1,15 @@
+-- Queue of /profiles/process-resume requests. The API inserts a pending row and
+-- app/workers/process_resume_worker.py polls for pending rows, runs the extraction
+-- and stores the parsed jobs/summary/skills in result.
+create table if not exists public.process_resume_jobs (
+    id uuid primary key default gen_random_uuid(),
+    user_id uuid not null,
+    resume_text text not null,
+    status text not null default 'pending',
+    result jsonb,
+    error text,
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now()
+);
+
+create index if not exists process_resume_jobs_status_idx on public.process_resume_jobs (status);